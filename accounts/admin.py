@@ -6,6 +6,8 @@ Accounts admin
 ###
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
 
 from . import models
 
@@ -24,5 +26,17 @@ class UserAdmin(BaseUserAdmin):
 
 @admin.register(models.ChangeEmailRequest)
 class ChangeEmailRequestAdmin(admin.ModelAdmin):
-    list_display = ('email',)
-    readonly_fields = ('uuid',)
+    list_display = ('email', 'expires_at',)
+    readonly_fields = ('uuid', 'expires_at',)
+
+
+@admin.register(models.OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'created_at', 'send_after', 'attempts', 'failed',)
+    list_filter = ('failed',)
+    readonly_fields = ('created_at', 'attempts', 'last_error',)
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.update(failed=False, attempts=0, send_after=timezone.now())
+    retry.short_description = _('Retry the selected emails')
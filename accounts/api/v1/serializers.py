@@ -4,7 +4,7 @@ API V1: Accounts Serializers
 ###
 # Libraries
 ###
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 from rest_auth.models import TokenModel
 from rest_auth.serializers import (
     UserDetailsSerializer as BaseUserDetailsSerializer,
@@ -17,6 +17,8 @@ from accounts.forms import (
     CustomResetPasswordForm,
 )
 
+User = get_user_model()
+
 
 ###
 # Serializers
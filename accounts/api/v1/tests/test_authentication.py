@@ -0,0 +1,72 @@
+"""
+API V1: Test Authentication
+"""
+###
+# Libraries
+###
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+###
+# Test Cases
+###
+class CachedTokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='testuser',
+            email='testuser@example.com',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.url = reverse('rest_user_details')
+
+    def test_cached_token_skips_the_database(self):
+        """Tests that a repeated request authenticates
+        without querying the tokens table.
+        """
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([
+            query for query in queries if 'authtoken_token' in query['sql']
+        ])
+
+    @override_settings(LOCAL_MEMORY_CACHE_SHARED=False)
+    def test_unshared_cache_is_skipped(self):
+        """Tests that tokens are read from the database when other
+        workers couldn't expire them in the cache.
+        """
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue([
+            query for query in queries if 'authtoken_token' in query['sql']
+        ])
+
+    def test_logout_expires_token(self):
+        self.client.get(self.url)
+        self.client.post(reverse('rest_logout'))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_expires_token(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,97 @@
+"""
+API V1: Test Change Email
+"""
+###
+# Libraries
+###
+from datetime import timedelta
+from io import StringIO
+
+from allauth.account.models import EmailAddress
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import ChangeEmailRequest
+
+User = get_user_model()
+
+
+###
+# Test Cases
+###
+class ChangeEmailTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='testuser',
+            email='testuser@example.com',
+        )
+        EmailAddress.objects.create(user=self.user, email=self.user.email, primary=True)
+        Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.user.auth_token.key)
+
+    def request_change(self, email='new@example.com'):
+        response = self.client.post(reverse('change-email'), {'email': email})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return ChangeEmailRequest.objects.get(user=self.user)
+
+    def confirm(self, change_request):
+        return self.client.get(
+            reverse('change-email-confirmation', kwargs={'uuid': change_request.uuid})
+        )
+
+    def test_confirm(self):
+        change_request = self.request_change()
+        self.assertGreater(change_request.expires_at, timezone.now())
+
+        response = self.confirm(change_request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'new@example.com')
+        self.assertFalse(ChangeEmailRequest.objects.exists())
+
+    def test_expired_requests_are_not_found(self):
+        change_request = self.request_change()
+        ChangeEmailRequest.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.confirm(change_request)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'testuser@example.com')
+
+    def test_new_requests_invalidate_previous_links(self):
+        previous = self.request_change('first@example.com')
+        ChangeEmailRequest.objects.update(expires_at=timezone.now())
+        change_request = self.request_change('second@example.com')
+
+        self.assertNotEqual(change_request.uuid, previous.uuid)
+        self.assertGreater(change_request.expires_at, timezone.now())
+        response = self.confirm(previous)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_purge_expired_requests(self):
+        now = timezone.now()
+        users = [
+            User.objects.create(username='user{0}'.format(i), email='user{0}@example.com'.format(i))
+            for i in range(5)
+        ]
+        ChangeEmailRequest.objects.bulk_create([
+            ChangeEmailRequest(
+                user=user,
+                email='new{0}@example.com'.format(i),
+                expires_at=now + timedelta(hours=1 if i == 0 else -i)
+            )
+            for i, user in enumerate(users)
+        ])
+
+        out = StringIO()
+        call_command('purge_change_email_requests', batch_size=2, stdout=out)
+        self.assertIn('Deleted 4 expired', out.getvalue())
+        self.assertEqual(
+            list(ChangeEmailRequest.objects.values_list('email', flat=True)),
+            ['new0@example.com']
+        )
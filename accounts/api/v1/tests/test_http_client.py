@@ -0,0 +1,165 @@
+"""
+API V1: Test HTTP Client
+"""
+###
+# Libraries
+###
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from accounts.http_client import (
+    CircuitBreaker,
+    ProviderClient,
+    ProviderUnavailable,
+    get_client,
+)
+
+
+###
+# Stub server
+###
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers with the next of the server's `responses`, given as
+    `(status, delay in seconds)`, and the profile as JSON.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.connections.add(self.client_address)
+        status, delay = server.responses.pop(0) if server.responses else (200, 0)
+        time.sleep(delay)
+
+        body = json.dumps({'id': '1', 'email': 'user@example.com'}).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except ConnectionError:
+            # The client gave up waiting
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+###
+# Test Cases
+###
+@override_settings(
+    SOCIAL_HTTP_READ_TIMEOUT=0.2,
+    SOCIAL_HTTP_RETRIES=1,
+    SOCIAL_HTTP_BREAKER_THRESHOLD=2,
+)
+class ProviderClientTestCase(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = 'http://127.0.0.1:{0}/me'.format(self.server.server_port)
+        self.client = ProviderClient()
+        cache.clear()
+
+    def test_connections_are_reused(self):
+        self.client.get_json('facebook', self.url, {'access_token': 'a'})
+        self.client.get_json('facebook', self.url, {'access_token': 'b'})
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_server_errors_are_retried(self):
+        self.server.responses = [(503, 0)]
+
+        profile = self.client.get_json('facebook', self.url, {})
+        self.assertEqual(profile['email'], 'user@example.com')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_slow_provider_times_out(self):
+        self.server.responses = [(200, 1), (200, 1)]
+
+        start = time.monotonic()
+        with self.assertRaises(ProviderUnavailable):
+            self.client.get_json('facebook', self.url, {})
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_client_errors_are_raised(self):
+        self.server.responses = [(401, 0)]
+
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_json('facebook', self.url, {})
+
+    def test_circuit_breaker(self):
+        """Tests that failing providers stop being called for a
+        while, without affecting others.
+        """
+        self.server.responses = [(500, 0)] * 4
+        for _ in range(2):
+            with self.assertRaises(ProviderUnavailable):
+                self.client.get_json('facebook', self.url, {})
+        calls = len(self.server.requests)
+
+        with self.assertRaises(ProviderUnavailable):
+            self.client.get_json('facebook', self.url, {})
+        self.assertEqual(len(self.server.requests), calls)
+
+        self.server.responses = []
+        self.client.get_json('google', self.url, {})
+        # Let through again once the reset timeout is over
+        self.client.breakers['facebook'].reset_timeout = 0
+        self.client.get_json('facebook', self.url, {})
+
+    def test_half_open_circuit_breaker(self):
+        """Tests that a single call probes a provider once the reset
+        timeout is over, the others failing fast until it succeeds.
+        """
+        breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+        breaker.failed()
+        self.assertFalse(breaker.allows())
+
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allows())
+        self.assertFalse(breaker.allows())
+        breaker.failed()
+        self.assertFalse(breaker.allows())
+
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allows())
+        breaker.succeeded()
+        self.assertTrue(breaker.allows())
+        self.assertTrue(breaker.allows())
+
+    def test_profiles_are_cached_by_token(self):
+        self.client.get_profile('google', self.url, 'token1', {'access_token': 'token1'})
+        self.client.get_profile('google', self.url, 'token1', {'access_token': 'token1'})
+        self.client.get_profile('google', self.url, 'token2', {'access_token': 'token2'})
+
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_client_is_shared_by_threads(self):
+        """Tests that threads share the process' client, and so
+        its connection pool and circuit breakers.
+        """
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(get_client())) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(clients[0], clients[1])
+        self.assertIs(clients[0], get_client())
@@ -0,0 +1,134 @@
+"""
+API V1: Test Email Outbox
+"""
+###
+# Libraries
+###
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from accounts.models import OutboxEmail
+
+User = get_user_model()
+
+
+###
+# Email backends
+###
+class RecordingBackend(locmem.EmailBackend):
+    """Counts the connections opened, failing to send to `broken`."""
+    opened = 0
+    broken = set()
+    connected = False
+
+    def open(self):
+        if self.connected:
+            return False
+        self.connected = True
+        RecordingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.broken.intersection(message.to):
+                raise SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+###
+# Test Cases
+###
+@override_settings(
+    EMAIL_BACKEND='accounts.api.v1.tests.test_outbox.RecordingBackend',
+    OUTBOX_MAX_ATTEMPTS=2,
+    OUTBOX_RETRY_DELAY=60,
+)
+class OutboxEmailTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='testuser',
+            email='testuser@example.com',
+        )
+        self.user.set_password('testuser')
+        self.user.save()
+        Token.objects.create(user=self.user)
+
+        RecordingBackend.opened = 0
+        RecordingBackend.broken = set()
+
+    def send_outbox_emails(self):
+        call_command('send_outbox_emails', once=True, stdout=StringIO(), stderr=StringIO())
+
+    def test_change_email_is_queued(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.user.auth_token.key)
+        response = self.client.post(reverse('change-email'), {'email': 'new@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, 'new@example.com')
+        self.assertIn(str(self.user.change_email_request.uuid), email.body)
+
+        self.send_outbox_emails()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_password_reset_is_queued(self):
+        response = self.client.post(reverse('rest_password_reset'), {'email': self.user.email})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, self.user.email)
+        self.assertNotIn('\n', email.subject)
+
+        self.send_outbox_emails()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_batches_share_a_connection(self):
+        OutboxEmail.objects.queue(
+            'Subject', 'Body', None, ['user{0}@example.com'.format(i) for i in range(5)]
+        )
+        call_command('send_outbox_emails', once=True, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(RecordingBackend.opened, 1)
+
+    def test_failures_are_retried_with_backoff(self):
+        RecordingBackend.broken = {'broken@example.com'}
+        OutboxEmail.objects.queue('Subject', 'Body', None, ['broken@example.com', 'user@example.com'])
+
+        self.send_outbox_emails()
+        self.assertEqual([message.to for message in mail.outbox], [['user@example.com']])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('SMTPServerDisconnected', email.last_error)
+        self.assertGreater(email.send_after, timezone.now() + timedelta(seconds=50))
+
+        # Not due yet
+        self.send_outbox_emails()
+        self.assertEqual(OutboxEmail.objects.get().attempts, 1)
+
+        OutboxEmail.objects.update(send_after=timezone.now())
+        self.send_outbox_emails()
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.attempts, 2)
+        self.assertTrue(email.failed)
+        self.assertFalse(OutboxEmail.objects.due().exists())
@@ -4,11 +4,10 @@ API V1: Accounts Views
 ###
 # Libraries
 ###
-from smtplib import SMTPException
+import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.db import transaction
 from django.http import HttpRequest, Http404
 from django.shortcuts import render
@@ -21,9 +20,10 @@ from rest_framework import (
 from rest_framework.response import Response
 from rest_auth.registration.views import SocialLoginView
 
-from accounts.custom_providers import CustomFacebookOAuth2Adapter, CustomGoogleOAuth2Adapter
 from accounts.models import (
     ChangeEmailRequest,
+    OutboxEmail,
+    get_change_email_expiry,
 )
 from . import serializers
 
@@ -47,34 +47,31 @@ class ChangeEmailViewSet(generics.GenericAPIView):
         user = request.user
         email = serializer.data.get('email')
 
+        # New requests get a new link, invalidating the previous one
         change_request, _ = ChangeEmailRequest.objects.update_or_create(
-            user=user, defaults={'email': email}
+            user=user, defaults={
+                'email': email,
+                'uuid': uuid.uuid4(),
+                'expires_at': get_change_email_expiry(),
+            }
         )
 
         confirmation_link = HttpRequest.build_absolute_uri(
             request, location=str(change_request.uuid)
         )
 
-        try:
-            context = {
-                'email': user.email,
-                'confirmation_link': confirmation_link,
-            }
-            html_email = render_to_string('account/change_email.html', context)
-            txt_email = render_to_string('account/change_email.txt', context)
-            send_mail(
-                subject='backend-challenge-001 - Email Confirmation',
-                message=txt_email,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=False,
-                html_message=html_email
-            )
-        except SMTPException:
-            return Response(
-                'Failed to send email',
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        context = {
+            'email': user.email,
+            'confirmation_link': confirmation_link,
+        }
+        # Sent by `send_outbox_emails` once the request commits
+        OutboxEmail.objects.queue(
+            subject='backend-challenge-001 - Email Confirmation',
+            message=render_to_string('account/change_email.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[email],
+            html_message=render_to_string('account/change_email.html', context)
+        )
 
         response_payload = {
             'message': 'Confirmation email has been sent.'
@@ -87,7 +84,7 @@ class ChangeEmailConfirmationViewSet(generics.GenericAPIView):
 
     def get(self, request, *args, **kwargs):
         try:
-            change_request = ChangeEmailRequest.objects.get(uuid=self.kwargs.get('uuid'))
+            change_request = ChangeEmailRequest.objects.active().get(uuid=self.kwargs.get('uuid'))
         except (ChangeEmailRequest.DoesNotExist, ValidationError):
             raise Http404('No requests match the given UUID')
 
@@ -101,12 +98,19 @@ class ChangeEmailConfirmationViewSet(generics.GenericAPIView):
             user.auth_token.delete()
 
             change_request.delete()
-        return render('account/change_email_done.html', {'first_name': user.first_name})
+        return render(request, 'account/change_email_done.html', {'first_name': user.first_name})
 
 
+# The providers are imported by the first social login, not on startup
 class FacebookLogin(SocialLoginView):
-    adapter_class = CustomFacebookOAuth2Adapter
+    @property
+    def adapter_class(self):
+        from accounts.custom_providers import CustomFacebookOAuth2Adapter
+        return CustomFacebookOAuth2Adapter
 
 
 class GoogleLogin(SocialLoginView):
-    adapter_class = CustomGoogleOAuth2Adapter
+    @property
+    def adapter_class(self):
+        from accounts.custom_providers import CustomGoogleOAuth2Adapter
+        return CustomGoogleOAuth2Adapter
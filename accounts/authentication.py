@@ -0,0 +1,69 @@
+"""
+Accounts Authentication
+"""
+###
+# Libraries
+###
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import ugettext as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from helpers.cache import is_shared_cache
+
+
+###
+# Helpers
+###
+def get_token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    # Raw keys are credentials, so they never reach the cache
+    return 'auth-token:{0}'.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def expire_cached_tokens(keys):
+    """Drops `keys` from the token cache right away and once more
+    when the current transaction commits, so that a request reading
+    the old rows in between can't cache them again.
+    """
+    cache_keys = [token_cache_key(key) for key in keys]
+    if not cache_keys:
+        return
+    get_token_cache().delete_many(cache_keys)
+    transaction.on_commit(lambda: get_token_cache().delete_many(cache_keys))
+
+
+###
+# Authentication classes
+###
+class CachedTokenAuthentication(TokenAuthentication):
+    """A `TokenAuthentication` that keeps tokens, and the users
+    they belong to, cached for `AUTH_TOKEN_CACHE_TIMEOUT` seconds.
+
+    Cached tokens are expired by `accounts.signals` whenever they
+    are deleted (logout, email changes) or their user is saved.
+    That only reaches every worker through a shared cache, so
+    tokens are read from the database when it isn't one.
+    """
+    def authenticate_credentials(self, key):
+        if not is_shared_cache(settings.AUTH_TOKEN_CACHE_ALIAS):
+            return super().authenticate_credentials(key)
+
+        cache = get_token_cache()
+        cache_key = token_cache_key(key)
+
+        token = cache.get(cache_key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
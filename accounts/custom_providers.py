@@ -4,7 +4,6 @@ Accounts: Custom providers
 ###
 # Libraries
 ###
-import requests
 from allauth.socialaccount.adapter import get_adapter
 from allauth.socialaccount.models import (
     SocialLogin,
@@ -21,6 +20,8 @@ from allauth.socialaccount.providers.facebook.views import (
 from allauth.socialaccount.providers.google.provider import GoogleProvider
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 
+from accounts.http_client import get_client
+
 
 ###
 # Auxiliary functions
@@ -58,26 +59,27 @@ def custom_social_login_from_response(provider, request, response):
 
 def fb_custom_login(request, app, token):
     provider = CustomFacebookProvider(request)
-    resp = requests.get(
+    extra_data = get_client().get_profile(
+        provider.id,
         GRAPH_API_URL + '/me',
+        token.token,
         params={
             'fields': ','.join(provider.get_fields()),
             'access_token': token.token,
             'appsecret_proof': compute_appsecret_proof(app, token)
         })
-    resp.raise_for_status()
-    extra_data = resp.json()
     login = provider.sociallogin_from_response(request, extra_data)
     return login
 
 
 def google_custom_login(request, app, token, profile_url):
     provider = CustomGoogleProvider(request)
-    resp = requests.get(
-        profile_url, params={'access_token': token.token, 'alt': 'json'}
+    extra_data = get_client().get_profile(
+        provider.id,
+        profile_url,
+        token.token,
+        params={'access_token': token.token, 'alt': 'json'}
     )
-    resp.raise_for_status()
-    extra_data = resp.json()
     login = provider.sociallogin_from_response(request, extra_data)
     return login
 
@@ -6,6 +6,9 @@ Accounts Form
 ###
 from django.contrib.auth.forms import PasswordResetForm
 from django.conf import settings
+from django.template.loader import render_to_string
+
+from accounts.models import OutboxEmail
 
 
 ###
@@ -15,7 +18,8 @@ class CustomResetPasswordForm(PasswordResetForm):
     def send_mail(self, subject_template_name, email_template_name,
                   context, from_email, to_email, html_email_template_name=None):
         """
-        Sends a django.core.mail.EmailMultiAlternatives to `to_email`.
+        Queues the email to `to_email` in the outbox, rather than
+        sending it during the request.
         """
         reset_url = '{}/change-password/{}/{}'.format(
             settings.FE_URL,
@@ -25,11 +29,15 @@ class CustomResetPasswordForm(PasswordResetForm):
         context.update({
             'reset_url': reset_url,
         })
-        return super().send_mail(
-            subject_template_name=subject_template_name,
-            email_template_name=email_template_name,
-            context=context,
+        subject = render_to_string(subject_template_name, context)
+        html_email = None
+        if html_email_template_name is not None:
+            html_email = render_to_string(html_email_template_name, context)
+        return OutboxEmail.objects.queue(
+            # Email subject *must not* contain newlines
+            subject=''.join(subject.splitlines()),
+            message=render_to_string(email_template_name, context),
             from_email=from_email,
-            to_email=to_email,
-            html_email_template_name=html_email_template_name
+            recipient_list=[to_email],
+            html_message=html_email
         )
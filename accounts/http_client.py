@@ -0,0 +1,169 @@
+"""
+Accounts: HTTP client for social login providers
+"""
+###
+# Libraries
+###
+import hashlib
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import ugettext_lazy as _
+from requests.adapters import HTTPAdapter
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from urllib3.util.retry import Retry
+
+
+###
+# Exceptions
+###
+class ProviderUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('The login provider is unavailable, try again later.')
+    default_code = 'provider_unavailable'
+
+
+###
+# Circuit breakers
+###
+class CircuitBreaker:
+    """Stops calling a provider for `reset_timeout` seconds once
+    `threshold` calls in a row failed, so that an outage doesn't
+    hold workers up until their timeouts. A single call after that
+    is let through to find out whether it's back, while the others
+    keep failing fast.
+
+    Shared by the threads of a process, hence the lock.
+    """
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allows(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # Half open: this call probes the provider, and the
+            # others wait for another `reset_timeout` unless it
+            # succeeds first. A failure opens it again.
+            self.opened_at = now
+            return True
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failed(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+###
+# Client
+###
+class ProviderClient:
+    """Requests to social login providers over a pooled session
+    with bounded timeouts and retries, behind a circuit breaker per
+    provider. One per process, shared by its threads (see
+    `get_client`): the session's connection pool is thread safe.
+    """
+    def __init__(self):
+        self.session = requests.Session()
+        retries = Retry(
+            total=settings.SOCIAL_HTTP_RETRIES,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.SOCIAL_HTTP_POOL_SIZE,
+            pool_maxsize=settings.SOCIAL_HTTP_POOL_SIZE,
+            max_retries=retries,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.breakers = {}
+        self.breakers_lock = threading.Lock()
+
+    def get_breaker(self, provider):
+        with self.breakers_lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(
+                    settings.SOCIAL_HTTP_BREAKER_THRESHOLD,
+                    settings.SOCIAL_HTTP_BREAKER_RESET_TIMEOUT
+                )
+            return self.breakers[provider]
+
+    def get_json(self, provider, url, params):
+        """Returns the JSON `url` answers with. Raises
+        `ProviderUnavailable` on timeouts, connection errors and
+        server errors (which count against the circuit breaker) and
+        `requests.HTTPError` on client errors (e.g. expired tokens).
+        """
+        breaker = self.get_breaker(provider)
+        if not breaker.allows():
+            raise ProviderUnavailable()
+
+        try:
+            response = self.session.get(
+                url,
+                params=params,
+                timeout=(settings.SOCIAL_HTTP_CONNECT_TIMEOUT, settings.SOCIAL_HTTP_READ_TIMEOUT)
+            )
+        except requests.RequestException:
+            breaker.failed()
+            raise ProviderUnavailable()
+        if response.status_code >= 500:
+            breaker.failed()
+            raise ProviderUnavailable()
+
+        breaker.succeeded()
+        response.raise_for_status()
+        return response.json()
+
+    def get_profile(self, provider, url, token, params):
+        """`get_json` for the profile behind `token`, remembered for
+        `SOCIAL_PROFILE_CACHE_TIMEOUT` seconds so that repeated
+        logins with the same token skip the provider.
+        """
+        cache = caches[settings.SOCIAL_PROFILE_CACHE_ALIAS]
+        key = 'social-profile:{0}'.format(
+            hashlib.sha256('{0}:{1}'.format(url, token).encode()).hexdigest()
+        )
+        profile = cache.get(key)
+        if profile is None:
+            profile = self.get_json(provider, url, params)
+            cache.set(key, profile, settings.SOCIAL_PROFILE_CACHE_TIMEOUT)
+        return profile
+
+
+# Client of the current process, and its id
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the client of the current process, creating it after
+    forks so that workers don't share sockets.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = ProviderClient()
+            _client_pid = os.getpid()
+        return _client
@@ -0,0 +1,57 @@
+"""
+Deletes the expired change email requests
+"""
+###
+# Libraries
+###
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import ChangeEmailRequest
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Deletes the change email requests whose confirmation link '
+        'expired, a bounded number of rows per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows deleted per statement.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to wait between batches, to spread the load.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                # Walks the `expires_at` index, oldest first
+                pks = list(
+                    ChangeEmailRequest.objects.expired().order_by(
+                        'expires_at'
+                    ).values_list('pk', flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                deleted += ChangeEmailRequest.objects.filter(pk__in=pks).delete()[0]
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted {0} expired change email requests.'.format(deleted)
+        ))
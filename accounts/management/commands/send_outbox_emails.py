@@ -0,0 +1,103 @@
+"""
+Sends the emails queued in the outbox
+"""
+###
+# Libraries
+###
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import OutboxEmail
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Sends the emails queued in the outbox, a batch at a time over '
+        'one email backend connection, retrying failures with an '
+        'exponential backoff. Polls for new ones unless --once is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of emails locked and sent per transaction.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait for new emails once the outbox is drained.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the outbox is drained.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options['batch_size'])
+            if sent or failed:
+                self.stdout.write('Sent {0} emails, {1} failed.'.format(sent, failed))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        """Sends every due email, returning how many were sent and
+        how many failed. Several workers may drain at once: each
+        batch is locked, skipping the rows locked by the others.
+
+        Emails are sent before their batch commits, so a worker
+        dying in between sends them again (at least once delivery).
+        """
+        sent = failed = 0
+        with get_connection() as connection:
+            while True:
+                with transaction.atomic():
+                    emails = list(
+                        OutboxEmail.objects.due().select_for_update(skip_locked=True)[:batch_size]
+                    )
+                    if not emails:
+                        break
+
+                    delivered = []
+                    for email in emails:
+                        try:
+                            # Reconnects after failures, a no-op otherwise
+                            connection.open()
+                            email.get_message(connection).send()
+                        except Exception as error:
+                            connection.close()
+                            self.retry_later(email, error)
+                            failed += 1
+                        else:
+                            delivered.append(email.pk)
+                    OutboxEmail.objects.filter(pk__in=delivered).delete()
+                    sent += len(delivered)
+        return sent, failed
+
+    def retry_later(self, email, error):
+        """Schedules the next attempt at `email`, giving up after
+        `OUTBOX_MAX_ATTEMPTS` of them.
+        """
+        email.attempts += 1
+        email.last_error = repr(error)
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.failed = True
+            self.stderr.write('Gave up sending {0}: {1!r}'.format(email, error))
+        else:
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+            email.send_after = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=['attempts', 'last_error', 'failed', 'send_after'])
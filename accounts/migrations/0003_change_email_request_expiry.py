@@ -0,0 +1,25 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:54
+
+import accounts.models
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outbox_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeemailrequest',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=accounts.models.get_change_email_expiry, editable=False, verbose_name='expires at'),
+        ),
+        migrations.AlterField(
+            model_name='changeemailrequest',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='uuid'),
+        ),
+    ]
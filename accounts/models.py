@@ -5,9 +5,13 @@ Accounts Models
 # Libraries
 ###
 import uuid
+from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.mail import EmailMultiAlternatives
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 
 
@@ -16,9 +20,47 @@ from django.utils.translation import ugettext as _
 ###
 
 
+###
+# Helpers
+###
+def get_change_email_expiry():
+    return timezone.now() + timedelta(seconds=settings.CHANGE_EMAIL_REQUEST_TIMEOUT)
+
+
 ###
 # Querysets
 ###
+class ChangeEmailRequestQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    def queue(self, subject, message, from_email, recipient_list, html_message=None):
+        """Stores an email per recipient for `send_outbox_emails`
+        to send, as part of the current transaction. Takes the
+        arguments of `send_mail`.
+        """
+        return self.bulk_create([
+            self.model(
+                to=recipient,
+                from_email=from_email or '',
+                subject=subject,
+                body=message,
+                html_body=html_message or '',
+            )
+            for recipient in recipient_list
+        ])
+
+    def due(self):
+        """Returns the emails to send (or retry) by now, oldest first."""
+        return self.filter(
+            failed=False,
+            send_after__lte=timezone.now()
+        ).order_by('send_after', 'pk')
 
 
 ###
@@ -34,8 +76,15 @@ class ChangeEmailRequest(models.Model):
     uuid = models.UUIDField(
         default=uuid.uuid4,
         editable=False,
+        unique=True,
         verbose_name=_('uuid'),
     )
+    expires_at = models.DateTimeField(
+        default=get_change_email_expiry,
+        editable=False,
+        db_index=True,
+        verbose_name=_('expires at'),
+    )
 
     # User model
     user = models.OneToOneField(
@@ -47,3 +96,59 @@ class ChangeEmailRequest(models.Model):
 
     # Email
     email = models.EmailField(verbose_name=_('email'))
+
+    objects = ChangeEmailRequestQuerySet.as_manager()
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by `send_outbox_emails`, so that
+    requests don't wait on the email backend. Deleted once sent.
+    """
+    # Message
+    to = models.EmailField(verbose_name=_('to'))
+    from_email = models.CharField(
+        verbose_name=_('from email'),
+        max_length=254,
+        blank=True
+    )
+    subject = models.CharField(verbose_name=_('subject'), max_length=998)
+    body = models.TextField(verbose_name=_('body'))
+    html_body = models.TextField(verbose_name=_('HTML body'), blank=True)
+
+    # Delivery
+    created_at = models.DateTimeField(verbose_name=_('created at'), auto_now_add=True)
+    send_after = models.DateTimeField(verbose_name=_('send after'), default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(verbose_name=_('attempts'), default=0)
+    last_error = models.TextField(verbose_name=_('last error'), blank=True)
+    failed = models.BooleanField(
+        verbose_name=_('failed'),
+        default=False,
+        help_text=_('Set once every attempt failed, until retried by hand.')
+    )
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs `OutboxEmailQuerySet.due`
+            models.Index(
+                fields=['send_after', 'id'],
+                name='outbox_email_due_idx',
+                condition=models.Q(failed=False)
+            ),
+        ]
+
+    def __str__(self):
+        return '{0}: {1}'.format(self.to, self.subject)
+
+    def get_message(self, connection=None):
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=[self.to],
+            connection=connection
+        )
+        if self.html_body:
+            message.attach_alternative(self.html_body, 'text/html')
+        return message
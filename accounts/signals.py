@@ -4,8 +4,49 @@ Accounts Signals
 ###
 # Libraries
 ###
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from helpers.cache import GLOBAL_SCOPE, bump_versions
+from .authentication import expire_cached_tokens
+from .models import User
 
 
 ###
 # Signals
 ###
+# Saving only these doesn't change what the API shows of a user
+UNLISTED_USER_FIELDS = {'last_login', 'password'}
+
+
+@receiver(post_save, sender=User)
+def expire_author_responses(sender, instance, created, update_fields, **kwargs):
+    """Users are embedded as authors all over the cached
+    responses, so editing one expires the whole cache.
+    """
+    if created:
+        return
+    if update_fields and set(update_fields) <= UNLISTED_USER_FIELDS:
+        return
+    bump_versions(GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def expire_user_tokens(sender, instance, created, **kwargs):
+    """Cached tokens hold a copy of their user, so any change
+    (deactivation included) has to be read from the database again.
+    """
+    if created:
+        return
+    expire_cached_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Token)
+def expire_deleted_token(sender, instance, **kwargs):
+    """Logging out and confirming an email change delete the
+    user's token, which must stop authenticating right away.
+    """
+    expire_cached_tokens([instance.key])
@@ -4,9 +4,26 @@ Comments app's serializers
 ###
 # Libraries
 ###
+from django.utils.translation import ugettext as _
 from rest_framework import serializers
 from rest_auth.serializers import UserDetailsSerializer
-from ..models import Comment
+from ..models import MAX_DEPTH, Comment
+
+
+###
+# Fields
+###
+class ParentCommentField(serializers.PrimaryKeyRelatedField):
+    """Takes parents from the `parents` context key (comments by
+    pk, e.g. loaded at once for a bulk creation) when they're
+    there, and queries them otherwise.
+    """
+    def to_internal_value(self, data):
+        parents = self.context.get('parents', {})
+        try:
+            return parents[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
 
 
 ###
@@ -16,6 +33,16 @@ class CommentSerializer(serializers.ModelSerializer):
     """A basic serializer for the `Comment` model."""
     author = UserDetailsSerializer(read_only=True)
     post = serializers.ReadOnlyField(source='post.title')
+    parent = ParentCommentField(
+        queryset=Comment.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
+    # Used by `NestedViewSetMixin` to filter on the parent post
+    parent_lookup_kwargs = {
+        'post_pk': 'post'
+    }
 
     class Meta:
         model = Comment
@@ -26,5 +53,33 @@ class CommentSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'post',
+            'parent',
+            'depth',
+            'reply_count',
+            'score',
+            'upvotes',
+            'downvotes',
             'author',
         ]
+
+    def validate_parent(self, parent):
+        """Replies stay on their parent's post, under `MAX_DEPTH`,
+        and can't be moved once created (their paths depend on it).
+        """
+        if self.instance is not None:
+            if parent != self.instance.parent:
+                raise serializers.ValidationError(_("Replies can't be moved."))
+            return parent
+        if parent is None:
+            return parent
+
+        view = self.context.get('view')
+        if view is not None and str(parent.post_id) != str(view.kwargs.get('post_pk')):
+            raise serializers.ValidationError(
+                _('Replies must belong to the same post as their parent.')
+            )
+        if parent.depth >= MAX_DEPTH:
+            raise serializers.ValidationError(
+                _("Replies can't be nested more than {0} levels deep.").format(MAX_DEPTH)
+            )
+        return parent
@@ -0,0 +1,66 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from helpers.search import keep_search_index
+
+drop_search_index, create_search_index = keep_search_index(
+    'comments_comment', ['title', 'content']
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('comments', '0003_comment_threads'),
+    ]
+
+    operations = [
+        drop_search_index,
+        migrations.CreateModel(
+            name='CommentVote',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('value', models.SmallIntegerField(choices=[(1, 'upvote'), (-1, 'downvote')], verbose_name='value')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='downvotes'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='score',
+            field=models.IntegerField(default=0, editable=False, verbose_name='score'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='upvotes'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-score', '-id'], name='comment_post_score_idx'),
+        ),
+        migrations.AddField(
+            model_name='commentvote',
+            name='comment',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='comments.Comment', verbose_name='comment'),
+        ),
+        migrations.AddField(
+            model_name='commentvote',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='user'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='commentvote',
+            unique_together={('comment', 'user')},
+        ),
+        create_search_index,
+    ]
@@ -5,8 +5,18 @@ Comments app's models
 # Libraries
 ###
 from django.db import models
+from django.db.models import (
+    CharField,
+    F,
+    OuterRef,
+    Subquery,
+    Value,
+    Window,
+    prefetch_related_objects,
+)
+from django.db.models.functions import Cast, Concat, LPad, RowNumber
 from django.utils.translation import ugettext as _
-from helpers.models import Publishable
+from helpers.models import Publishable, Votable, Vote
 from posts.models import Post
 
 
@@ -15,18 +25,116 @@ from posts.models import Post
 ###
 
 
+###
+# Paths
+###
+# Every comment's `path` is its ancestors' ids followed by its own,
+# zero-padded to the same width so that sorting paths sorts a thread
+# depth first, oldest replies first. Digits sort the same way under
+# every collation, which keeps the range queries below index-friendly.
+PATH_STEP_WIDTH = 10
+PATH_MAX_LENGTH = 250
+MAX_DEPTH = PATH_MAX_LENGTH // PATH_STEP_WIDTH - 1
+
+
+def to_path_step(pk):
+    return str(pk).zfill(PATH_STEP_WIDTH)
+
+
+def path_upper_bound(path):
+    """Returns the smallest path that sorts after every path
+    starting with `path`, i.e. its next sibling's.
+    """
+    prefix, last_step = path[:-PATH_STEP_WIDTH], path[-PATH_STEP_WIDTH:]
+    return prefix + to_path_step(int(last_step) + 1)
+
+
 ###
 # Querysets
 ###
+class CommentQuerySet(models.QuerySet):
+    def latest_per_post(self, post_ids, limit):
+        """Returns the `limit` latest comments of each post in
+        `post_ids`, with their authors, in two queries: one that
+        ranks comments per post with `ROW_NUMBER()` and keeps the
+        top `limit` of each, and one that fetches the authors.
+        """
+        ranked = self.filter(post__in=post_ids).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('post_id')],
+                order_by=F('id').desc()
+            )
+        )
+        sql, params = ranked.query.sql_with_params()
+        comments = list(self.raw(
+            'SELECT * FROM ({0}) ranked '
+            'WHERE ranked.row_number <= %s '
+            'ORDER BY ranked.post_id, ranked.row_number'.format(sql),
+            params + (limit,)
+        ))
+        prefetch_related_objects(comments, 'author')
+        return comments
+
+    def thread(self, post_id, root=None, after=None, max_depth=MAX_DEPTH):
+        """Returns, in path order, the comments of a post's thread
+        (or of the subtree under `root`) down to `max_depth` levels
+        below it, with one range scan of the `(post, path)` index.
+
+        Passing `after` skips the top level comments (or `root`'s
+        replies) up to that id, along with their replies.
+        """
+        queryset = self.filter(post=post_id)
+        if root is None:
+            depth = max_depth
+            if after is not None:
+                queryset = queryset.filter(path__gte=to_path_step(after + 1))
+        else:
+            depth = root.depth + max_depth
+            if after is not None:
+                lower = root.path + to_path_step(after + 1)
+                queryset = queryset.filter(path__gte=lower)
+            else:
+                queryset = queryset.filter(path__gt=root.path)
+            queryset = queryset.filter(path__lt=path_upper_bound(root.path))
+        return queryset.filter(depth__lte=depth).order_by('path')
+
+    def assign_paths(self, comments, batch_size=None):
+        """Stores the paths of comments inserted with `bulk_create`,
+        whose ids weren't known beforehand. Parents must either be
+        saved already or come earlier in `comments`.
+        """
+        for comment in comments:
+            comment.set_path()
+        self.bulk_update(comments, ['path', 'depth'], batch_size=batch_size)
+
+    def fill_paths(self):
+        """Stores the paths of comments written without one (e.g.
+        by `import_forum`), one thread level per statement, and
+        returns how many were filled.
+        """
+        step = LPad(Cast('id', CharField()), PATH_STEP_WIDTH, Value('0'))
+        filled = self.filter(path='', parent__isnull=True).update(path=step, depth=0)
+
+        parents = self.model._base_manager.filter(pk=OuterRef('parent_id'))
+        while True:
+            updated = self.filter(path='', parent__path__gt='').update(
+                path=Concat(Subquery(parents.values('path')), step),
+                depth=Subquery(parents.values('depth')) + 1
+            )
+            if not updated:
+                return filled
+            filled += updated
 
 
 ###
 # Models
 ###
-class Comment(Publishable):
+class Comment(Publishable, Votable):
     """The model equivalent of a comment. A comment
     belongs to a specific `Post` and is created by
-    an user (`Publishable.author`).
+    an user (`Publishable.author`). Users vote on it
+    (`CommentVote`, counted by `Votable`).
     """
     content = models.TextField(
         verbose_name=_('content'),
@@ -36,5 +144,100 @@ class Comment(Publishable):
     post = models.ForeignKey(
         to=Post,
         on_delete=models.CASCADE,
-        verbose_name=_('post')
+        verbose_name=_('post'),
+        # Covered by the composite indexes below
+        db_index=False
     )
+
+    # Threads
+    parent = models.ForeignKey(
+        to='self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name=_('parent'),
+        null=True,
+        blank=True
+    )
+    path = models.CharField(
+        verbose_name=_('path'),
+        max_length=PATH_MAX_LENGTH,
+        default='',
+        editable=False
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name=_('depth'),
+        default=0,
+        editable=False
+    )
+
+    # Denormalized counters
+    reply_count = models.PositiveIntegerField(
+        verbose_name=_('reply count'),
+        default=0,
+        editable=False
+    )
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs `CommentViewSet`'s default ordering
+            models.Index(
+                fields=['post', '-id'],
+                name='comment_post_id_idx'
+            ),
+            # Backs the keyset pagination of a post's comments
+            models.Index(
+                fields=['post', '-created_at', '-id'],
+                name='comment_post_created_idx'
+            ),
+            # Backs the "top" sort of a post's comments
+            models.Index(
+                fields=['post', '-score', '-id'],
+                name='comment_post_score_idx'
+            ),
+            # Backs thread and subtree reads (see `CommentQuerySet.thread`)
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_post_path_idx'
+            ),
+            # Backs `CommentModelAdmin.ordering`
+            models.Index(
+                fields=['-updated_at'],
+                name='comment_updated_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # Paths end with the comment's own id, only known by now
+        if not self.path:
+            self.set_path()
+            type(self).objects.filter(pk=self.pk).update(
+                path=self.path,
+                depth=self.depth
+            )
+
+    def set_path(self):
+        if self.parent_id is None:
+            self.path = to_path_step(self.pk)
+            self.depth = 0
+        else:
+            self.path = self.parent.path + to_path_step(self.pk)
+            self.depth = self.parent.depth + 1
+
+
+class CommentVote(Vote):
+    """A user's up or down vote on a `Comment`."""
+    comment = models.ForeignKey(
+        to=Comment,
+        on_delete=models.CASCADE,
+        related_name='votes',
+        verbose_name=_('comment'),
+        # Covered by the unique index below
+        db_index=False
+    )
+
+    class Meta:
+        unique_together = [['comment', 'user']]
@@ -0,0 +1,122 @@
+"""
+Comments Signals
+"""
+###
+# Libraries
+###
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from helpers.cache import bump_versions, post_scope, topic_scope
+from helpers.counters import collect_deleted, decrement_deleted
+from helpers.votes import discount_votes
+from posts.models import Post
+from topic.models import Topic
+from .models import Comment, CommentVote
+
+User = get_user_model()
+
+
+###
+# Helpers
+###
+def get_topic_url_name(comment):
+    """Returns the URL name of `comment`'s topic without a query
+    when its post and topic are already loaded (e.g. by the viewsets).
+    """
+    if Comment.post.is_cached(comment) and Post.topic.is_cached(comment.post):
+        return comment.post.topic.url_name
+    return Topic.objects.filter(
+        post__pk=comment.post_id
+    ).values_list('url_name', flat=True).first()
+
+
+def get_counters(comment):
+    return [
+        (Post, comment.post_id, 'comment_count'),
+        (Comment, comment.parent_id, 'reply_count'),
+    ]
+
+
+def expire_comment_responses(comment):
+    """Expires the post's responses and, since post listings show
+    comment counts and previews, its topic's as well.
+    """
+    scopes = [post_scope(comment.post_id)]
+    url_name = get_topic_url_name(comment)
+    if url_name is not None:
+        scopes.append(topic_scope(url_name))
+    bump_versions(*scopes)
+
+
+###
+# Signals
+###
+@receiver(post_save, sender=Comment)
+def increment_post_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Counts new comments in `Post.comment_count` and their
+    parent's `Comment.reply_count`, wherever they're created from
+    (viewsets, admin, ORM). Bulk inserts send no signals and count
+    theirs themselves; fixtures come counted.
+    """
+    if not created or raw:
+        return
+    Post.objects.filter(
+        pk=instance.post_id
+    ).update(comment_count=F('comment_count') + 1)
+    if instance.parent_id is not None:
+        Comment.objects.filter(
+            pk=instance.parent_id
+        ).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_save, sender=Comment)
+def expire_responses_on_save(sender, instance, **kwargs):
+    expire_comment_responses(instance)
+
+
+@receiver(pre_delete, sender=Comment)
+def collect_deleted_comment(sender, instance, **kwargs):
+    collect_deleted(instance, *get_counters(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_post_comment_count(sender, instance, **kwargs):
+    """Keeps `Post.comment_count` and `Comment.reply_count` in sync
+    whenever comments go away, including comments removed by
+    cascading deletes, with a single update per remaining post or
+    parent. Posts deleted as well expire their own responses.
+    """
+    post_counter, parent_counter = get_counters(instance)
+    if decrement_deleted(post_counter):
+        expire_comment_responses(instance)
+    decrement_deleted(parent_counter)
+
+
+@receiver(post_save, sender=CommentVote)
+def expire_responses_on_vote(sender, instance, **kwargs):
+    """Votes change the comment's counters (see `cast_vote`)."""
+    if CommentVote.comment.is_cached(instance):
+        expire_comment_responses(instance.comment)
+
+
+@receiver(pre_delete, sender=User)
+def discount_user_votes(sender, instance, **kwargs):
+    """Takes the votes of a user about to be deleted out of the
+    counters of the comments they're on, all at once. Comments by
+    the user, or under their posts, are left out, since they go
+    away as well.
+    """
+    votes = CommentVote.objects.filter(user=instance).exclude(
+        Q(comment__author=instance) | Q(comment__post__author=instance)
+    )
+    comments = discount_votes(Comment, votes).order_by().values_list(
+        'post_id', 'post__topic__url_name'
+    ).distinct()
+    scopes = set()
+    for post_id, url_name in comments:
+        scopes.update((post_scope(post_id), topic_scope(url_name)))
+    if scopes:
+        bump_versions(*scopes)
@@ -6,13 +6,16 @@ Comments testing
 ###
 from datetime import time
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
 from topic.models import Topic
 from posts.models import Post
-from .models import Comment
+from .models import Comment, to_path_step
 
 
 User = get_user_model()
@@ -397,3 +400,670 @@ class CommentDeletionTestCase(APITestCase):
             id=self.comment1.id
         )
         self.assertTrue(deleted_comment.exists())
+
+
+class CommentKeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+
+        # More comments than fit in a single page
+        for i in range(25):
+            Comment.objects.create(
+                title='Title {0}'.format(i),
+                author=self.user1,
+                content='A smart addendum {0}'.format(i),
+                post=self.post1
+            )
+
+    def test_list_comments_with_cursor(self):
+        """Tests that walking the cursors returns every comment
+        exactly once, newest first.
+        """
+        url = reverse(
+            'comment-list',
+            args=[
+                self.topic1.url_name,
+                self.post1.id
+            ]
+        )
+        response = self.client.get(url, {'paginate': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        ids = [comment['id'] for comment in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['next'])
+        ids += [comment['id'] for comment in response.data['results']]
+        expected_ids = list(Comment.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected_ids)
+
+
+class CommentQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=self.password_example
+        )
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.create_comments(2)
+
+    def create_comments(self, amount):
+        """Creates `amount` comments, each by a different author."""
+        offset = Comment.objects.count()
+        for i in range(offset, offset + amount):
+            author = User.objects.create(
+                username='author{0}'.format(i),
+                password=self.password_example
+            )
+            Comment.objects.create(
+                title='Title {0}'.format(i),
+                author=author,
+                content='A smart addendum {0}'.format(i),
+                post=self.post1
+            )
+
+    def test_list_comments_query_count(self):
+        """Tests that the number of queries needed to list
+        a post's comments doesn't grow with the size of the page.
+        """
+        url = reverse(
+            'comment-list',
+            args=[
+                self.topic1.url_name,
+                self.post1.id
+            ]
+        )
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url)
+
+        self.create_comments(10)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(url)
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(large_page), len(small_page))
+
+
+class CommentCounterTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.url = reverse(
+            'comment-list',
+            args=[
+                self.topic1.url_name,
+                self.post1.id
+            ]
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+
+    def test_comment_creation_and_deletion_update_counter(self):
+        """Tests that creating and deleting comments keeps
+        `Post.comment_count` in sync.
+        """
+        payload = {
+            'title': 'Title',
+            'content': 'A smart addendum',
+        }
+        response = self.client.post(self.url, payload)
+        self.client.post(self.url, payload)
+
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 2)
+
+        self.client.delete(
+            reverse(
+                'comment-detail',
+                args=[
+                    self.topic1.url_name,
+                    self.post1.id,
+                    response.data['id']
+                ]
+            )
+        )
+
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 1)
+        response = self.client.get(
+            reverse('post-detail', args=[self.topic1.url_name, self.post1.id])
+        )
+        self.assertEqual(response.data['comment_count'], 1)
+
+    def test_cascade_deletion_updates_counter(self):
+        """Tests that comments removed along with their author
+        are discounted from `Post.comment_count`.
+        """
+        user2 = User.objects.create(username='user2')
+        Token.objects.create(user=user2)
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + user2.auth_token.key
+        )
+        payload = {
+            'title': 'Title',
+            'content': 'A smart addendum',
+        }
+        self.client.post(self.url, payload)
+        self.client.post(self.url, payload)
+        user2.delete()
+
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 0)
+
+    def test_cascade_deletion_updates_each_parent_once(self):
+        """Tests that counters take cascading deletes in one update
+        per remaining parent, and none for parents deleted as well.
+        """
+        user2 = User.objects.create(username='user2')
+        root = Comment.objects.create(
+            title='Title',
+            author=user2,
+            content='A smart addendum',
+            post=self.post1
+        )
+        for _ in range(3):
+            Comment.objects.create(
+                title='Title',
+                author=user2,
+                content='A smart reply',
+                post=self.post1,
+                parent=root
+            )
+
+        with CaptureQueriesContext(connection) as captured:
+            user2.delete()
+
+        updates = [
+            query['sql'] for query in captured if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len([sql for sql in updates if 'comment_count' in sql]), 1)
+        self.assertFalse([sql for sql in updates if 'reply_count' in sql])
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 0)
+
+    def test_comments_created_outside_the_viewset_are_counted(self):
+        """Tests that comments created through the ORM (e.g. the
+        admin) count towards `comment_count` and `reply_count`.
+        """
+        root = Comment.objects.create(
+            title='Title',
+            author=self.user1,
+            content='A smart addendum',
+            post=self.post1
+        )
+        reply = Comment.objects.create(
+            title='Title',
+            author=self.user1,
+            content='A smart reply',
+            post=self.post1,
+            parent=root
+        )
+
+        self.post1.refresh_from_db()
+        root.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 2)
+        self.assertEqual(root.reply_count, 1)
+
+        reply.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 0)
+
+
+class CommentBulkCreationTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.url = reverse(
+            'comment-bulk',
+            args=[self.topic1.url_name, self.post1.id]
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+
+    def test_bulk_creation_success(self):
+        """Tests that every comment is created, in order, and
+        counted on the post.
+        """
+        payload = [
+            {'title': 'Title {0}'.format(i), 'content': 'A smart addendum'}
+            for i in range(3)
+        ]
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        comments = Comment.objects.filter(post=self.post1).order_by('id')
+        self.assertEqual(
+            [result['data']['id'] for result in response.data],
+            [comment.id for comment in comments]
+        )
+        self.assertEqual(
+            [comment.title for comment in comments],
+            ['Title 0', 'Title 1', 'Title 2']
+        )
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 3)
+
+    def test_bulk_creation_partial_success(self):
+        """Tests that invalid items are reported without
+        preventing the valid ones from being created.
+        """
+        payload = [
+            {'title': 'Title 1', 'content': 'A smart addendum'},
+            {'title': 'Title 2'},
+        ]
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [result['status'] for result in response.data],
+            [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST]
+        )
+        self.assertIn('content', response.data[1]['errors'])
+        self.assertEqual(Comment.objects.filter(post=self.post1).count(), 1)
+
+    def test_bulk_replies_query_count(self):
+        """Tests that the parents replied to are loaded at once,
+        whatever the number of replies.
+        """
+        roots = [
+            Comment.objects.create(
+                title='Title',
+                author=self.user1,
+                content='A smart addendum',
+                post=self.post1
+            )
+            for _ in range(2)
+        ]
+
+        def create_replies(count):
+            payload = [
+                {'title': 'Title', 'content': 'A smart reply', 'parent': roots[i % 2].id}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(captured)
+
+        # The first request also caches the token
+        create_replies(2)
+        self.assertEqual(create_replies(2), create_replies(6))
+        roots[0].refresh_from_db()
+        self.assertEqual(roots[0].reply_count, 5)
+
+    def test_bulk_creation_expires_cached_listing(self):
+        list_url = reverse(
+            'comment-list',
+            args=[self.topic1.url_name, self.post1.id]
+        )
+        self.client.get(list_url)
+        self.client.post(
+            self.url,
+            [{'title': 'Title 1', 'content': 'A smart addendum'}],
+            format='json'
+        )
+
+        response = self.client.get(list_url)
+        self.assertEqual(response.data['count'], 1)
+
+
+class CommentSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.post2 = Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        self.comment1 = Comment.objects.create(
+            title='Agreed',
+            author=self.user1,
+            content='Great point about caching',
+            post=self.post1
+        )
+        Comment.objects.create(
+            title='Disagreed',
+            author=self.user1,
+            content='Terrible point',
+            post=self.post1
+        )
+        Comment.objects.create(
+            title='Elsewhere',
+            author=self.user1,
+            content='Caching on another post',
+            post=self.post2
+        )
+
+    def test_search_comments_on_post(self):
+        """Tests that only the matching comments of the
+        post are found.
+        """
+        url = reverse('comment-list', args=[self.topic1.url_name, self.post1.id])
+        response = self.client.get(url, {'search': 'caching'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [comment['id'] for comment in response.data['results']],
+            [self.comment1.id]
+        )
+
+
+class CommentThreadTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.post2 = Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+        self.list_url = reverse(
+            'comment-list',
+            args=[self.topic1.url_name, self.post1.id]
+        )
+        self.thread_url = reverse(
+            'comment-post-thread',
+            args=[self.topic1.url_name, self.post1.id]
+        )
+
+        self.root1 = self.reply(None)
+        self.reply1 = self.reply(self.root1)
+        self.reply2 = self.reply(self.root1)
+        self.reply1a = self.reply(self.reply1)
+        self.root2 = self.reply(None)
+
+    def reply(self, parent):
+        response = self.client.post(self.list_url, {
+            'title': 'Title',
+            'content': 'A smart addendum',
+            'parent': parent.id if parent is not None else '',
+        })
+        return Comment.objects.get(pk=response.data['id'])
+
+    def get_ids(self, items):
+        return [item['id'] for item in items]
+
+    def test_replies_get_paths(self):
+        self.assertEqual(
+            self.reply1a.path,
+            to_path_step(self.root1.id) +
+            to_path_step(self.reply1.id) +
+            to_path_step(self.reply1a.id)
+        )
+        self.assertEqual(self.reply1a.depth, 2)
+        self.root1.refresh_from_db()
+        self.assertEqual(self.root1.reply_count, 2)
+
+    def test_post_thread(self):
+        """Tests that the whole thread is nested, oldest
+        replies first.
+        """
+        response = self.client.get(self.thread_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        roots = response.data['results']
+        self.assertEqual(self.get_ids(roots), [self.root1.id, self.root2.id])
+        self.assertEqual(
+            self.get_ids(roots[0]['replies']),
+            [self.reply1.id, self.reply2.id]
+        )
+        self.assertEqual(
+            self.get_ids(roots[0]['replies'][0]['replies']),
+            [self.reply1a.id]
+        )
+        self.assertIsNone(response.data['more_replies'])
+
+    def test_thread_query_count(self):
+        """Tests that reading a thread doesn't query the
+        database once per comment.
+        """
+        with CaptureQueriesContext(connection) as small_thread:
+            self.client.get(self.thread_url)
+
+        parent = self.reply1a
+        for _ in range(3):
+            parent = self.reply(parent)
+        with CaptureQueriesContext(connection) as large_thread:
+            self.client.get(self.thread_url, {'depth': 10})
+
+        self.assertEqual(len(large_thread), len(small_thread))
+
+    def test_subtree_depth(self):
+        url = reverse(
+            'comment-thread',
+            args=[self.topic1.url_name, self.post1.id, self.root1.id]
+        )
+        response = self.client.get(url, {'depth': 1})
+
+        self.assertEqual(response.data['id'], self.root1.id)
+        reply1 = response.data['replies'][0]
+        self.assertEqual(reply1['replies'], [])
+        self.assertIn(
+            reverse(
+                'comment-thread',
+                args=[self.topic1.url_name, self.post1.id, self.reply1.id]
+            ),
+            reply1['more_replies']
+        )
+
+    @override_settings(COMMENT_THREAD_REPLIES_LIMIT=1)
+    def test_more_replies(self):
+        """Tests that branches over the replies limit link
+        to their remaining replies.
+        """
+        url = reverse(
+            'comment-thread',
+            args=[self.topic1.url_name, self.post1.id, self.root1.id]
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            self.get_ids(response.data['replies']),
+            [self.reply1.id]
+        )
+
+        response = self.client.get(response.data['more_replies'])
+        self.assertEqual(
+            self.get_ids(response.data['replies']),
+            [self.reply2.id]
+        )
+        self.assertIsNone(response.data['more_replies'])
+
+    def test_reply_to_another_post(self):
+        url = reverse(
+            'comment-list',
+            args=[self.topic1.url_name, self.post2.id]
+        )
+        response = self.client.post(url, {
+            'title': 'Title',
+            'content': 'A smart addendum',
+            'parent': self.root1.id,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reply_deletion_decrements_counter(self):
+        self.reply2.delete()
+
+        self.root1.refresh_from_db()
+        self.assertEqual(self.root1.reply_count, 1)
+
+
+class CommentVoteTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.comment1 = Comment.objects.create(
+            title='Title 1',
+            author=self.user1,
+            content='A smart addendum 1',
+            post=self.post1
+        )
+        self.comment2 = Comment.objects.create(
+            title='Title 2',
+            author=self.user1,
+            content='A smart addendum 2',
+            post=self.post1
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+
+    def test_vote_and_sort_by_top(self):
+        """Tests that votes are counted and expire the cached
+        listings sorted on them.
+        """
+        list_url = reverse('comment-list', args=[self.topic1.url_name, self.post1.id])
+        self.client.get(list_url, {'sort': 'top'})
+
+        response = self.client.post(
+            reverse('comment-vote', args=[self.topic1.url_name, self.post1.id, self.comment1.id]),
+            {'value': 1}
+        )
+        self.assertEqual(response.data['score'], 1)
+
+        response = self.client.get(list_url, {'sort': 'top'})
+        self.assertEqual(
+            [(comment['id'], comment['score']) for comment in response.data['results']],
+            [(self.comment1.id, 1), (self.comment2.id, 0)]
+        )
+
+    def test_cascade_deletion_updates_counters(self):
+        """Tests that votes deleted along with their user are
+        taken out of the comment's counters.
+        """
+        user2 = User.objects.create(username='user2')
+        self.comment1.votes.create(user=user2, value=-1)
+        self.comment1.votes.create(user=self.user1, value=1)
+        Comment.objects.filter(pk=self.comment1.pk).update(upvotes=1, downvotes=1)
+
+        user2.delete()
+
+        self.comment1.refresh_from_db()
+        self.assertEqual(
+            (self.comment1.upvotes, self.comment1.downvotes, self.comment1.score),
+            (1, 0, 1)
+        )
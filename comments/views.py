@@ -4,32 +4,208 @@ Comment app's views
 ###
 # Libraries
 ###
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import ModelViewSet
 from .api.serializers import CommentSerializer
+from .models import MAX_DEPTH
 from rest_framework.filters import OrderingFilter
+from rest_framework_nested.viewsets import NestedViewSetMixin
+from helpers.bulk import BulkCreateMixin, bulk_insert
+from helpers.cache import CachedResponseMixin, bump_versions, post_scope, topic_scope
+from helpers.conditional import ConditionalGetMixin
+from helpers.pagination import PageNumberOrKeysetPagination
+from helpers.search import FullTextSearchFilter
+from helpers.votes import SortFilter, VoteMixin
 from helpers.permissions import ObjectPermissionIsAuthenticatedOrReadOnly
+from helpers.replica import ReplicaReadMixin
 from posts.models import Post
 
 
 ###
 # Viewsets
 ###
-class CommentViewSet(ModelViewSet):
-    """A basic viewset for the `Comment` model."""
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                     BulkCreateMixin, VoteMixin, NestedViewSetMixin, ModelViewSet):
+    """A basic viewset for the `Comment` model, nested
+    under a `Post` (see `CommentSerializer.parent_lookup_kwargs`).
+    """
     serializer_class = CommentSerializer
     model = CommentSerializer.Meta.model
-    filter_backends = [OrderingFilter]
+    queryset = model.objects.select_related('author', 'post__topic')
+    filter_backends = [OrderingFilter, SortFilter, FullTextSearchFilter]
     ordering = '-id'
+    ordering_fields = ['id', 'created_at']
+    sort_orderings = {
+        'top': ('-score', '-id'),
+        'new': ('-id',),
+    }
+    search_fields = ['title', 'content']
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [ObjectPermissionIsAuthenticatedOrReadOnly]
 
-    def get_queryset(self):
-        return self.model.objects.filter(
-            post=self.kwargs['post_pk']
-        )
+    def get_cache_scopes(self):
+        return [post_scope(self.kwargs['post_pk'])]
+
+    @action(detail=False, methods=['get'], url_path='thread', url_name='post-thread')
+    def post_thread(self, request, *args, **kwargs):
+        """The post's whole thread, top level comments first."""
+        return self.get_cached_response(self.get_thread_response, request, *args, **kwargs)
+
+    @action(detail=True, methods=['get'])
+    def thread(self, request, *args, **kwargs):
+        """A comment along with its replies."""
+        return self.get_cached_response(self.get_thread_response, request, *args, **kwargs)
+
+    def get_thread_param(self, name, default, maximum=None):
+        try:
+            value = max(0, int(self.request.query_params[name]))
+        except (KeyError, ValueError):
+            return default
+        return value if maximum is None else min(value, maximum)
+
+    def get_thread_response(self, request, *args, **kwargs):
+        """Reads the thread (or the subtree under the requested
+        comment) with a single range query and nests it in Python.
+
+        Up to `?depth=` levels (`COMMENT_THREAD_DEPTH` by default) are
+        read, at most `COMMENT_THREAD_MAX_SIZE` comments overall, and
+        `COMMENT_THREAD_REPLIES_LIMIT` replies are shown per branch.
+        Branches with more replies get a `more_replies` link, which
+        continues after the last one shown (`?after=`).
+        """
+        root = self.get_object() if self.detail else None
+        if root is None:
+            post = get_object_or_404(
+                Post.objects.select_related('topic'),
+                pk=self.kwargs['post_pk']
+            )
+        else:
+            post = root.post
+        depth = self.get_thread_param('depth', settings.COMMENT_THREAD_DEPTH, MAX_DEPTH)
+        after = self.get_thread_param('after', None)
+
+        max_size = settings.COMMENT_THREAD_MAX_SIZE
+        comments = list(self.model.objects.select_related('author').thread(
+            post.pk, root=root, after=after, max_depth=depth
+        )[:max_size + 1])
+        truncated = len(comments) > max_size
+
+        replies = defaultdict(list)
+        for comment in comments[:max_size]:
+            comment.post = post
+            replies[comment.parent_id].append(comment)
+
+        # Serializes every comment shown in one go
+        limit = settings.COMMENT_THREAD_REPLIES_LIMIT
+        shown = []
+        branches = [root.pk if root is not None else None]
+        while branches:
+            branch = replies[branches.pop()][:limit]
+            shown += branch
+            branches += [comment.pk for comment in branch]
+        data = dict(zip(
+            [comment.pk for comment in shown],
+            self.get_serializer(shown, many=True).data
+        ))
+
+        def render(comment):
+            item = data[comment.pk]
+            fetched = replies[comment.pk]
+            item['replies'] = [render(reply) for reply in fetched[:limit]]
+            item['more_replies'] = None
+            if len(fetched) > limit or len(fetched) < comment.reply_count:
+                item['more_replies'] = self.get_more_replies_link(
+                    comment, fetched[:limit], depth
+                )
+            return item
+
+        # Without `after`, a comment's own `reply_count` tells whether
+        # all of its replies were read; otherwise only the top level
+        # read is known to be cut short
+        fetched = replies[root.pk if root is not None else None]
+        more_replies = None
+        if len(fetched) > limit or truncated:
+            more_replies = self.get_more_replies_link(root, fetched[:limit], depth)
+
+        if root is None:
+            return Response({
+                'results': [render(comment) for comment in fetched[:limit]],
+                'more_replies': more_replies,
+            })
+
+        data[root.pk] = self.get_serializer(root).data
+        item = render(root)
+        if after is not None:
+            item['more_replies'] = more_replies
+        return Response(item)
+
+    def get_more_replies_link(self, comment, shown, depth):
+        kwargs = {
+            'topic_url_name': self.kwargs['topic_url_name'],
+            'post_pk': self.kwargs['post_pk'],
+        }
+        if comment is None:
+            url = self.reverse_action('post-thread', kwargs=kwargs)
+        else:
+            url = self.reverse_action('thread', kwargs=dict(kwargs, pk=comment.pk))
+        url = replace_query_param(url, 'depth', depth)
+        if shown:
+            url = replace_query_param(url, 'after', shown[-1].pk)
+        return url
 
     def perform_create(self, serializer):
-        post = Post.objects.get(id=self.kwargs['post_pk'])
+        post = Post.objects.select_related('topic').get(id=self.kwargs['post_pk'])
         serializer.save(
             author=self.request.user,
             post=post
         )
+
+    def get_bulk_parent(self):
+        return get_object_or_404(
+            Post.objects.select_related('topic'),
+            pk=self.kwargs['post_pk']
+        )
+
+    def get_bulk_serializer_context(self, comments, post):
+        """Loads the parents replied to at once, rather than one
+        query per reply.
+        """
+        pks = set()
+        for comment in comments:
+            try:
+                pks.add(int(comment['parent']))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return {'parents': self.model.objects.in_bulk(pks)}
+
+    def perform_bulk_create(self, comments, post):
+        for comment in comments:
+            comment.author = self.request.user
+            comment.post = post
+        bulk_insert(
+            self.model,
+            comments,
+            settings.BULK_CREATE_BATCH_SIZE,
+            author=self.request.user,
+            post=post
+        )
+        self.model.objects.assign_paths(comments, settings.BULK_CREATE_BATCH_SIZE)
+        Post.objects.filter(pk=post.pk).update(
+            comment_count=F('comment_count') + len(comments)
+        )
+        reply_counts = Counter(
+            comment.parent_id for comment in comments if comment.parent_id is not None
+        )
+        for parent_pk, count in reply_counts.items():
+            self.model.objects.filter(pk=parent_pk).update(
+                reply_count=F('reply_count') + count
+            )
+        # `bulk_create` skips the signals that usually do this
+        bump_versions(post_scope(post.pk), topic_scope(post.topic.url_name))
@@ -1,6 +1,12 @@
 #!/bin/bash
 set -e
 
+# Resolve the environment (S3 variables, private IP) once for every
+# process started below, instead of on each settings import
+if [ "$LOAD_ENVS_FROM_FILE" != "True" ]; then
+    python -m settings.environment
+fi
+
 if [ "$1" = "manage" ]; then
     shift 1
     exec python manage.py "$@"
@@ -13,6 +19,12 @@ else
     touch /usr/src/logs/access.log
     tail -n 0 -f /usr/src/logs/*.log &
 
+    # Metrics of every worker go to memory mapped files in here,
+    # emptied on start so that no stale worker gets reported
+    export PROMETHEUS_MULTIPROC_DIR=/tmp/prometheus
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
     # Start Gunicorn processes
     echo Starting Gunicorn.
     exec gunicorn settings.wsgi \
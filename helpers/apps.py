@@ -0,0 +1,20 @@
+"""
+Helpers Apps
+"""
+###
+# Libraries
+###
+from django.apps import AppConfig
+from django.core.checks import Tags, register
+
+
+###
+# Config
+###
+class HelpersConfig(AppConfig):
+    name = 'helpers'
+
+    def ready(self):
+        from helpers.checks import check_shared_caches, check_viewset_indexes
+        register(check_viewset_indexes, Tags.models)
+        register(check_shared_caches, Tags.caches)
@@ -0,0 +1,216 @@
+"""
+Bulk write helpers
+"""
+###
+# Libraries
+###
+import io
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Max
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+# Returned when some, but not all, of the items were created
+HTTP_207_MULTI_STATUS = 207
+
+
+###
+# Helpers
+###
+def bulk_insert(model, instances, batch_size, **filters):
+    """Inserts `instances` with `bulk_create`, `batch_size` rows per
+    statement, and makes sure every one of them gets its primary key.
+
+    Backends that can't return the inserted rows (e.g. SQLite) get
+    them read back: anything above the largest key seen beforehand
+    that matches `filters`, in insertion order. Must run inside a
+    transaction.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(instances, batch_size=batch_size)
+
+    last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    model.objects.bulk_create(instances, batch_size=batch_size)
+    pks = model.objects.filter(
+        pk__gt=last_pk, **filters
+    ).order_by('pk').values_list('pk', flat=True)
+    for instance, pk in zip(instances, pks):
+        instance.pk = pk
+    return instances
+
+
+def to_copy_text(value):
+    """Formats `value` for PostgreSQL's `COPY ... FROM STDIN`
+    text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return str(value).replace('\\', '\\\\').replace(
+        '\t', '\\t'
+    ).replace('\n', '\\n').replace('\r', '\\r')
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """Moves the primary key sequences of `models` past the
+    largest ids, after rows were written with explicit ones.
+    """
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+###
+# Writers
+###
+class BulkWriter:
+    """Writes rows, given as dicts of attribute names (e.g.
+    `author_id`) to values, straight into `model`'s table: with
+    `COPY` on PostgreSQL and a batched `INSERT` elsewhere.
+
+    Unlike `bulk_create`, no instance is built and no `pre_save`
+    runs, so values such as `created_at` are written as given.
+    Fields missing from a row get their default.
+    """
+    def __init__(self, model, using=DEFAULT_DB_ALIAS):
+        self.model = model
+        self.connection = connections[using]
+        self.fields = model._meta.concrete_fields
+
+        quote = self.connection.ops.quote_name
+        self.table = quote(model._meta.db_table)
+        self.columns = ', '.join(quote(field.column) for field in self.fields)
+
+    def prepare(self, row):
+        values = []
+        for field in self.fields:
+            if field.attname in row:
+                value = row[field.attname]
+            else:
+                value = field.get_default()
+            values.append(field.get_db_prep_save(value, self.connection))
+        return values
+
+    def write(self, rows):
+        """Writes `rows` and returns how many were written."""
+        values = [self.prepare(row) for row in rows]
+        if not values:
+            return 0
+
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                self.copy(cursor, values)
+            else:
+                cursor.executemany(
+                    'INSERT INTO {0} ({1}) VALUES ({2})'.format(
+                        self.table,
+                        self.columns,
+                        ', '.join(['%s'] * len(self.fields))
+                    ),
+                    values
+                )
+        return len(values)
+
+    def copy(self, cursor, values):
+        buffer = io.StringIO()
+        for row in values:
+            buffer.write('\t'.join(to_copy_text(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        cursor.copy_expert(
+            'COPY {0} ({1}) FROM STDIN'.format(self.table, self.columns),
+            buffer
+        )
+
+
+###
+# Mixins
+###
+class BulkCreateMixin:
+    """Adds a `bulk` route that creates every item of a JSON array
+    posted to the viewset's list route, all under one parent.
+
+    The parent is looked up once (`get_bulk_parent`), as are the
+    objects the items refer to, passed to the serializer's context
+    (`get_bulk_serializer_context`). Items are validated one after
+    the other by the same serializer and the valid ones are
+    inserted with `bulk_create`, `BULK_CREATE_BATCH_SIZE`
+    rows at a time (`perform_bulk_create`). Since `bulk_create` sends
+    no signals, `perform_bulk_create` has to keep counters and cached
+    responses up to date itself.
+
+    The response lists, in order, the `status` of every item along
+    with its `data` or `errors`. It's a 201 when every item was
+    created, a 400 when none was and a 207 otherwise.
+    """
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError(
+                {'non_field_errors': ['Expected a non-empty list of items.']}
+            )
+        if len(items) > settings.BULK_CREATE_MAX_ITEMS:
+            raise serializers.ValidationError({'non_field_errors': [
+                'Expected at most {0} items.'.format(settings.BULK_CREATE_MAX_ITEMS)
+            ]})
+
+        parent = self.get_bulk_parent()
+        serializer = self.get_serializer()
+        serializer.context.update(self.get_bulk_serializer_context(items, parent))
+        results, valid = [], []
+        for item in items:
+            try:
+                valid.append((len(results), serializer.run_validation(item)))
+                results.append(None)
+            except serializers.ValidationError as exc:
+                results.append({
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': exc.detail,
+                })
+
+        if valid:
+            instances = [
+                serializer.Meta.model(**validated_data)
+                for _, validated_data in valid
+            ]
+            with transaction.atomic():
+                self.perform_bulk_create(instances, parent)
+
+            for (index, _), instance in zip(valid, instances):
+                results[index] = {
+                    'status': status.HTTP_201_CREATED,
+                    'data': self.get_serializer(instance).data,
+                }
+
+        if len(valid) == len(items):
+            response_status = status.HTTP_201_CREATED
+        elif valid:
+            response_status = HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+    def get_bulk_parent(self):
+        raise NotImplementedError(
+            '{0} must implement `get_bulk_parent`.'.format(type(self).__name__)
+        )
+
+    def get_bulk_serializer_context(self, items, parent):
+        return {}
+
+    def perform_bulk_create(self, instances, parent):
+        raise NotImplementedError(
+            '{0} must implement `perform_bulk_create`.'.format(type(self).__name__)
+        )
@@ -0,0 +1,177 @@
+"""
+Response cache helpers
+"""
+###
+# Libraries
+###
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+###
+# Scopes
+###
+# Every cached response depends on this scope, so bumping it
+# expires the whole cache (e.g. after bulk maintenance)
+GLOBAL_SCOPE = 'all'
+TOPICS_SCOPE = 'topics'
+
+
+def topic_scope(url_name):
+    return 'topic:{0}'.format(url_name)
+
+
+def post_scope(pk):
+    return 'post:{0}'.format(pk)
+
+
+###
+# Versions
+###
+def is_shared_cache(alias):
+    """Tells whether every worker process sees the cache `alias`,
+    local memory caches only being shared where a single process
+    serves requests (`LOCAL_MEMORY_CACHE_SHARED`).
+    """
+    return settings.LOCAL_MEMORY_CACHE_SHARED or not isinstance(caches[alias], LocMemCache)
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(scope):
+    return 'response-cache:version:{0}'.format(scope)
+
+
+def new_version():
+    """Versions start with the second they were created at,
+    which conditional requests use as a modification time.
+    """
+    return '{0}.{1}'.format(int(time.time()), uuid.uuid4().hex)
+
+
+def get_version_timestamp(version):
+    return int(version.split('.')[0])
+
+
+def get_versions(scopes):
+    """Returns the current version of each scope, in order,
+    creating the ones that don't exist yet.
+    """
+    cache = get_cache()
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # `add` keeps whatever another process stored first
+        cache.add(key, new_version(), None)
+    if missing:
+        versions.update(cache.get_many(missing))
+
+    return [versions.get(key) for key in keys]
+
+
+def set_versions(scopes):
+    get_cache().set_many({
+        version_key(scope): new_version() for scope in scopes
+    }, None)
+
+
+def bump_versions(*scopes):
+    """Expires every response cached under `scopes`.
+
+    Versions are bumped right away and once more when the current
+    transaction commits, so that a response cached from the old
+    rows in between is never served afterwards.
+    """
+    set_versions(scopes)
+    transaction.on_commit(lambda: set_versions(scopes))
+
+
+###
+# Mixins
+###
+class CachedResponseMixin:
+    """Caches the data of `list` and `retrieve` responses under
+    the versions of the scopes returned by `get_cache_scopes`.
+
+    A response is fresh for `RESPONSE_CACHE_TIMEOUT` seconds and may
+    be served stale for `RESPONSE_CACHE_STALE_TIMEOUT` more while a
+    single request recomputes it. On a cold miss, only the request
+    holding the lock hits the database; the others wait up to
+    `RESPONSE_CACHE_LOCK_TIMEOUT` seconds for its result.
+    """
+    cache_poll_interval = 0.05
+
+    def get_cache_scopes(self):
+        raise NotImplementedError(
+            '{0} must implement `get_cache_scopes`.'.format(type(self).__name__)
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def should_cache_response(self, response):
+        return response.status_code == 200
+
+    def get_cache_key(self, request):
+        scopes = [GLOBAL_SCOPE] + self.get_cache_scopes()
+        query = sorted(request.query_params.lists())
+        # Pagination links are absolute, built from the request's host
+        origin = (request.scheme, request.get_host())
+        identity = repr((origin, request.path, query, get_versions(scopes)))
+        return 'response-cache:{0}'.format(
+            hashlib.sha256(identity.encode()).hexdigest()
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        lock_key = '{0}:lock'.format(key)
+        lock_timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT
+
+        entry = cache.get(key)
+        if entry is not None:
+            fresh_until, data = entry
+            if time.time() < fresh_until or not cache.add(lock_key, 1, lock_timeout):
+                return Response(data)
+            return self.refresh_cached_response(key, lock_key, handler, request, *args, **kwargs)
+
+        if cache.add(lock_key, 1, lock_timeout):
+            return self.refresh_cached_response(key, lock_key, handler, request, *args, **kwargs)
+
+        # Someone else is already computing it
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.cache_poll_interval)
+            entry = cache.get(key)
+            if entry is not None:
+                return Response(entry[1])
+        return handler(request, *args, **kwargs)
+
+    def refresh_cached_response(self, key, lock_key, handler, request, *args, **kwargs):
+        cache = get_cache()
+        try:
+            response = handler(request, *args, **kwargs)
+            if self.should_cache_response(response):
+                fresh_until = time.time() + settings.RESPONSE_CACHE_TIMEOUT
+                cache.set(
+                    key,
+                    (fresh_until, response.data),
+                    settings.RESPONSE_CACHE_TIMEOUT + settings.RESPONSE_CACHE_STALE_TIMEOUT
+                )
+        finally:
+            cache.delete(lock_key)
+        return response
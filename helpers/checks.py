@@ -0,0 +1,168 @@
+"""
+System checks
+"""
+###
+# Libraries
+###
+from django.conf import settings
+from django.core.checks import Error
+
+
+# Settings naming the cache aliases every worker has to share
+SHARED_CACHE_ALIAS_SETTINGS = (
+    'RESPONSE_CACHE_ALIAS',
+    'AUTH_TOKEN_CACHE_ALIAS',
+    'DATABASE_READ_REPLICA_PIN_CACHE_ALIAS',
+)
+
+
+###
+# Helpers
+###
+def get_router_viewsets():
+    """Returns every viewset registered on the API routers."""
+    from settings.routers import (
+        main_router,
+        posts_router,
+        comments_router
+    )
+
+    viewsets = []
+    for router in (main_router, posts_router, comments_router):
+        viewsets += [viewset for _, viewset, _ in router.registry]
+    return viewsets
+
+
+def get_index_columns(model):
+    """Returns the column lists of every index the database
+    keeps for `model`, leading column first.
+    """
+    opts = model._meta
+    indexes = [
+        [opts.get_field(name.lstrip('-')).column for name in index.fields]
+        for index in opts.indexes
+    ]
+    indexes += [
+        [opts.get_field(name).column for name in fields]
+        for fields in opts.unique_together
+    ]
+    indexes += [
+        [field.column]
+        for field in opts.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    ]
+    return indexes
+
+
+def get_orderings(viewset):
+    """Returns every ordering `viewset` may apply to its
+    queryset, as tuples of field names.
+    """
+    ordering = viewset.ordering
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    orderings = [tuple(ordering)] if ordering else []
+
+    orderings += [(field,) for field in viewset.ordering_fields or ()]
+    orderings += [
+        tuple(ordering) for ordering in getattr(viewset, 'sort_orderings', {}).values()
+    ]
+
+    keyset = getattr(viewset.pagination_class, 'keyset_pagination_class', None)
+    if keyset is not None:
+        orderings.append(tuple(keyset.ordering))
+    return orderings
+
+
+def is_supported(indexes, filter_columns, order_columns):
+    """Tells whether one of `indexes` starts with the filtered
+    columns (in any order) followed by the ordered ones.
+    """
+    prefix_size = len(filter_columns)
+    for columns in indexes:
+        if set(columns[:prefix_size]) != set(filter_columns):
+            continue
+        if columns[prefix_size:prefix_size + len(order_columns)] == order_columns:
+            return True
+    return False
+
+
+###
+# Checks
+###
+def check_viewset_indexes(app_configs=None, viewsets=None, **kwargs):
+    """Fails when a viewset filters or orders on columns that no
+    index supports, which would turn its listing into a table scan
+    followed by a sort.
+
+    Filters are read from the `parent_lookup_kwargs` of the viewset's
+    serializer (the `NestedViewSetMixin` convention) and orderings from
+    `ordering`, `ordering_fields`, `sort_orderings` (see
+    `helpers.votes.SortFilter`) and the keyset pagination class.
+    """
+    if viewsets is None:
+        viewsets = get_router_viewsets()
+
+    errors = []
+    for viewset in viewsets:
+        if viewset.ordering_fields in (None, '__all__'):
+            errors.append(Error(
+                '{0} lets clients order by any field.'.format(viewset.__name__),
+                hint='Set `ordering_fields` to indexed fields only.',
+                obj=viewset,
+                id='helpers.E001',
+            ))
+            continue
+
+        model = viewset.queryset.model
+        opts = model._meta
+        lookups = getattr(viewset.serializer_class, 'parent_lookup_kwargs', {})
+        filter_columns = [
+            opts.get_field(lookup.split('__')[0]).column
+            for lookup in lookups.values()
+        ]
+        indexes = get_index_columns(model)
+
+        for ordering in get_orderings(viewset):
+            order_columns = [
+                opts.get_field(name.lstrip('-')).column for name in ordering
+            ]
+            if is_supported(indexes, filter_columns, order_columns):
+                continue
+            errors.append(Error(
+                '{0} filters on ({1}) and orders by ({2}), but no index '
+                'on {3} supports it.'.format(
+                    viewset.__name__,
+                    ', '.join(filter_columns),
+                    ', '.join(order_columns),
+                    opts.db_table
+                ),
+                hint='Add a matching `models.Index` to {0}.Meta.indexes.'.format(
+                    model.__name__
+                ),
+                obj=viewset,
+                id='helpers.E002',
+            ))
+    return errors
+
+
+def check_shared_caches(app_configs=None, **kwargs):
+    """Fails when a cache alias that worker processes coordinate
+    through (e.g. response cache versions) is local to each of them,
+    which would let workers keep serving what others expired.
+    """
+    from helpers.cache import is_shared_cache
+
+    errors = []
+    for setting in SHARED_CACHE_ALIAS_SETTINGS:
+        alias = getattr(settings, setting)
+        if is_shared_cache(alias):
+            continue
+        errors.append(Error(
+            '{0} points to the local memory cache {1!r}, which worker '
+            'processes don\'t share.'.format(setting, alias),
+            hint='Set CACHE_BACKEND (and CACHE_LOCATION) to a shared backend, '
+                 'e.g. the file based one.',
+            id='helpers.E003',
+        ))
+    return errors
@@ -0,0 +1,91 @@
+"""
+Conditional request helpers
+"""
+###
+# Libraries
+###
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import GLOBAL_SCOPE, get_version_timestamp, get_versions, is_shared_cache
+
+
+###
+# Mixins
+###
+class ConditionalGetMixin:
+    """Adds `ETag` and `Last-Modified` to `list` and `retrieve`
+    responses and answers `If-None-Match`/`If-Modified-Since` with
+    a 304 before anything gets serialized.
+
+    Validators come from the versions of the view's cache scopes
+    (see `CachedResponseMixin.get_cache_scopes`), bumped by every
+    write a response shows (rows, counters, previews, deletions), so
+    lists are validated without querying their rows. Objects also
+    take their own `updated_at` into account.
+
+    Versions only tell what other workers wrote when the cache is
+    shared (see `helpers.checks.check_shared_caches`); otherwise
+    lists go without validators rather than answer 304 from a
+    worker that missed the write.
+    """
+    def list(self, request, *args, **kwargs):
+        if not is_shared_cache(settings.RESPONSE_CACHE_ALIAS):
+            return super().list(request, *args, **kwargs)
+        return self.get_conditional_response(
+            self.get_validators(request), super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = self.filter_queryset(self.get_queryset()).filter(**{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        }).order_by().aggregate(last_modified=Max('updated_at'))['last_modified']
+        if last_modified is None:
+            # Missing objects are up to `retrieve` (i.e. a 404)
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.get_conditional_response(
+            self.get_validators(request, last_modified),
+            super().retrieve,
+            request,
+            *args,
+            **kwargs
+        )
+
+    def get_validators(self, request, last_modified=None):
+        """Returns the response's `(etag, last_modified)`, given the
+        `updated_at` of the object it shows, if any.
+        """
+        versions = get_versions([GLOBAL_SCOPE] + self.get_cache_scopes())
+        timestamps = [get_version_timestamp(version) for version in versions]
+        if last_modified is not None:
+            timestamps.append(int(last_modified.timestamp()))
+            last_modified = last_modified.isoformat()
+
+        identity = repr((
+            request.path,
+            sorted(request.query_params.lists()),
+            request.accepted_media_type,
+            last_modified,
+            versions,
+        ))
+        etag = quote_etag(hashlib.sha256(identity.encode()).hexdigest())
+        return etag, max(timestamps)
+
+    def get_conditional_response(self, validators, handler, request, *args, **kwargs):
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
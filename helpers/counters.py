@@ -0,0 +1,68 @@
+"""
+Denormalized counters helpers
+"""
+###
+# Libraries
+###
+import threading
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+# What the deletion under way in this thread deletes, and takes
+# off its survivors' counters
+_deletion = threading.local()
+
+
+###
+# Helpers
+###
+def get_deletion():
+    if not hasattr(_deletion, 'deleted'):
+        _deletion.deleted = set()
+        _deletion.counts = Counter()
+        _deletion.collecting = False
+    return _deletion
+
+
+def collect_deleted(instance, *counters):
+    """Records that `instance` is about to be deleted and takes one
+    off each of `counters`, as `(model, pk, field)` of its parents.
+
+    To be called from `pre_delete` receivers, which Django sends
+    for every object of a deletion, cascades included, before
+    deleting any of them.
+    """
+    deletion = get_deletion()
+    if not deletion.collecting:
+        # A new deletion begins
+        deletion.deleted.clear()
+        deletion.counts.clear()
+        deletion.collecting = True
+    deletion.deleted.add((type(instance), instance.pk))
+    for model, pk, field in counters:
+        if pk is not None:
+            deletion.counts[(model, pk, field)] += 1
+
+
+def decrement_deleted(*counters):
+    """Applies what `collect_deleted` took off `counters`, with one
+    update per parent when the first of its deleted children gets
+    here, and none for parents deleted as well. Returns the pks of
+    the parents updated.
+
+    To be called from `post_delete` receivers, which Django sends
+    once every `pre_delete` has been.
+    """
+    deletion = get_deletion()
+    deletion.collecting = False
+    updated = []
+    for model, pk, field in counters:
+        count = deletion.counts.pop((model, pk, field), 0)
+        if count and (model, pk) not in deletion.deleted:
+            model.objects.filter(pk=pk).update(**{
+                field: Greatest(F(field) - count, 0)
+            })
+            updated.append(pk)
+    return updated
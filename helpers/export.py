@@ -0,0 +1,86 @@
+"""
+Streaming export helpers
+"""
+###
+# Libraries
+###
+import json
+import re
+import zlib
+from contextlib import contextmanager
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+# Same test as `django.middleware.gzip.GZipMiddleware`
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+###
+# Helpers
+###
+def to_ndjson(records, chunk_size):
+    """Encodes `records` as newline delimited JSON, yielding
+    `chunk_size` lines at a time.
+    """
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')))
+        if len(lines) >= chunk_size:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+@contextmanager
+def read_only_snapshot(using):
+    """Runs the block in a transaction of its own on `using`.
+
+    Streamed bodies are read after the request's transaction ended,
+    and outside of one Django opens PostgreSQL cursors `WITH HOLD`,
+    which materialize their whole result before the first row. In a
+    transaction they stream, from a single read only, repeatable
+    read snapshot.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        # Only the first statement of a transaction may set these
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        yield
+
+
+def gzip_chunks(chunks):
+    """Compresses `chunks` into a single gzip stream, flushing
+    after each one so that clients can decode as it arrives.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def ndjson_response(request, records, filename, chunk_size):
+    """Streams `records`, an iterator of dicts, as an NDJSON
+    attachment, gzipped when the client accepts it.
+
+    Nothing is read from `records` until the server starts
+    sending the body, and only `chunk_size` records are held in
+    memory at a time.
+    """
+    chunks = to_ndjson(records, chunk_size)
+    compress = re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="{0}"'.format(filename)
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
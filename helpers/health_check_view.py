@@ -4,12 +4,53 @@ Health check view
 ###
 # Libraries
 ###
+import time
 
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
 from django.http import HttpResponse
 
 
+###
+# Helpers
+###
+class ReadinessCheck:
+    """Tells whether the database answers, remembering the result
+    for `READINESS_CACHE_TIMEOUT` seconds so that probes only reach
+    the database once in a while.
+    """
+    def __init__(self):
+        self.checked_at = None
+        self.ready = False
+
+    def __call__(self):
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= settings.READINESS_CACHE_TIMEOUT:
+            self.ready = self.check_database()
+            self.checked_at = now
+        return self.ready
+
+    def check_database(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except DatabaseError:
+            return False
+
+
+is_ready = ReadinessCheck()
+
+
 ###
 # View
 ###
 def health_check(request):
     return HttpResponse("Health Check")
+
+
+@transaction.non_atomic_requests
+def ready(request):
+    if is_ready():
+        return HttpResponse("Ready")
+    return HttpResponse("Not Ready", status=503)
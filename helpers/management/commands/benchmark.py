@@ -0,0 +1,319 @@
+"""
+Benchmarks the API endpoints against a seeded database
+"""
+###
+# Libraries
+###
+import json
+import math
+import os
+import time
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from helpers.cache import GLOBAL_SCOPE, bump_versions
+from posts.models import Post
+from topic.models import Topic
+
+User = get_user_model()
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+# Options of `generate_dataset` that the baseline depends on
+DATASET_OPTIONS = ('users', 'topics', 'posts', 'comments', 'seed')
+# Cache the benchmarked responses go to, so that expiring them
+# between reads leaves the configured one alone
+BENCHMARK_CACHE_ALIAS = 'benchmark'
+
+
+###
+# Helpers
+###
+def percentile(values, rank):
+    """Nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    index = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def compare(results, baseline, tolerance, alloc_tolerance):
+    """Lists the regressions of `results` against `baseline`: any
+    extra query, or median latencies and allocations over the
+    baseline's by more than `tolerance` and `alloc_tolerance` (as
+    ratios). Tail latencies are reported but too noisy to compare.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append('{0}: {1} queries per request (baseline {2})'.format(
+                name, result['queries'], expected['queries']
+            ))
+        for metric, ratio in (('p50_ms', tolerance), ('alloc_kib', alloc_tolerance)):
+            if result[metric] > expected[metric] * (1 + ratio):
+                regressions.append('{0}: {1} {2} (baseline {3})'.format(
+                    name, metric, result[metric], expected[metric]
+                ))
+    return regressions
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Times the topic, post and comment routes, their create paths and '
+        'login, through the whole middleware and URL stack, and compares '
+        'p50/p95/p99 latencies, queries and memory allocated per request '
+        'with a baseline. By default it runs on a test database seeded with '
+        '`generate_dataset`, which is destroyed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Untimed requests sent first, e.g. to fill caches.'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Only runs the given scenarios (repeatable).'
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Writes the results as the new baseline instead of comparing.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=1.0,
+            help=(
+                'Ratio median latencies may grow by before being flagged. '
+                'Latencies only compare on the machine the baseline was taken on.'
+            )
+        )
+        parser.add_argument(
+            '--alloc-tolerance',
+            type=float,
+            default=0.1,
+            help='Ratio allocations may grow by before being flagged.'
+        )
+        parser.add_argument(
+            '--current-database',
+            action='store_true',
+            help='Runs on the current database, as is, instead of a seeded test one.'
+        )
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--topics', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['current_database']:
+            results = self.run(options)
+        else:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self.stdout.write('Seeding the test database...')
+                call_command(
+                    'generate_dataset',
+                    stdout=StringIO(),
+                    **{option: options[option] for option in DATASET_OPTIONS}
+                )
+                results = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        dataset = {option: options[option] for option in DATASET_OPTIONS}
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w') as baseline_file:
+                json.dump(
+                    {'dataset': dataset, 'scenarios': results},
+                    baseline_file,
+                    indent=2,
+                    sort_keys=True
+                )
+                baseline_file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                'Saved the baseline to {0}.'.format(options['baseline'])
+            ))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING('No baseline to compare with.'))
+            return
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('dataset') != dataset:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was taken on another dataset: {0}.'.format(baseline.get('dataset'))
+            ))
+
+        regressions = compare(
+            results,
+            baseline['scenarios'],
+            options['tolerance'],
+            options['alloc_tolerance']
+        )
+        if regressions:
+            raise CommandError('Regressions found:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    ###
+    # Scenarios
+    ###
+    def get_scenarios(self):
+        """Returns the name, URL and payload builder (none for
+        reads) of each scenario. Reads come first, so that writes
+        don't change what they read mid-run.
+        """
+        topic = Topic.objects.order_by('-post_count', 'pk').first()
+        post = Post.objects.filter(topic=topic).order_by('-comment_count', 'pk').first()
+        if post is None:
+            raise CommandError('The database needs at least one topic with a post.')
+        topic_args = [topic.url_name]
+        post_args = [topic.url_name, post.pk]
+        first_topic_id = (Topic.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0) + 1
+
+        return [
+            ('topic-list', reverse('topic-list'), None),
+            ('topic-detail', reverse('topic-detail', args=topic_args), None),
+            ('post-list', reverse('post-list', args=topic_args), None),
+            ('post-detail', reverse('post-detail', args=post_args), None),
+            ('comment-list', reverse('comment-list', args=post_args), None),
+            ('topic-create', reverse('topic-list'), lambda index: {
+                'title': 'Benchmark topic',
+                'description': 'Description',
+                'url_name': 'benchmark{0}'.format(first_topic_id + index),
+            }),
+            ('post-create', reverse('post-list', args=topic_args), lambda index: {
+                'title': 'Benchmark post',
+                'content': 'Rich content {0}'.format(index),
+            }),
+            ('comment-create', reverse('comment-list', args=post_args), lambda index: {
+                'title': 'Benchmark comment',
+                'content': 'A smart addendum {0}'.format(index),
+            }),
+            ('login', reverse('rest_login'), lambda index: {
+                'email': self.user.email,
+                'password': self.password,
+            }),
+        ]
+
+    def run(self, options):
+        """Times the scenarios with responses cached in a cache of
+        their own, which a single process shares.
+        """
+        caches = dict(settings.CACHES, **{BENCHMARK_CACHE_ALIAS: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmark',
+        }})
+        with override_settings(
+            CACHES=caches,
+            RESPONSE_CACHE_ALIAS=BENCHMARK_CACHE_ALIAS,
+            LOCAL_MEMORY_CACHE_SHARED=True
+        ):
+            return self.run_scenarios(options)
+
+    def run_scenarios(self, options):
+        self.password = 'benchmark'
+        self.user, _ = User.objects.get_or_create(
+            username='benchmark',
+            defaults={'email': 'benchmark@example.com'}
+        )
+        self.user.set_password(self.password)
+        self.user.save()
+        token, _ = Token.objects.get_or_create(user=self.user)
+
+        # Any host in `ALLOWED_HOSTS` would do, "testserver" isn't one
+        client = Client(SERVER_NAME='localhost')
+        headers = {'HTTP_AUTHORIZATION': 'Token ' + token.key}
+
+        results = {}
+        self.stdout.write('{0:<16}{1:>10}{2:>10}{3:>10}{4:>10}{5:>12}'.format(
+            'scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'alloc KiB'
+        ))
+        index = 0
+        for name, url, payload in self.get_scenarios():
+            if options['scenarios'] and name not in options['scenarios']:
+                continue
+
+            def expire():
+                # Reads would otherwise be served from the response
+                # cache after the first one, without any query
+                if payload is None:
+                    bump_versions(GLOBAL_SCOPE)
+
+            def send():
+                nonlocal index
+                index += 1
+                if payload is None:
+                    response = client.get(url, **headers)
+                else:
+                    response = client.post(
+                        url,
+                        json.dumps(payload(index)),
+                        content_type='application/json',
+                        **headers
+                    )
+                if response.status_code >= 400:
+                    raise CommandError('{0} failed with a {1}: {2}'.format(
+                        name, response.status_code, response.content[:200]
+                    ))
+
+            for _ in range(options['warmup']):
+                expire()
+                send()
+
+            latencies, queries = [], 0
+            for _ in range(options['iterations']):
+                expire()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    send()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                queries += len(captured)
+
+            # Separate requests, as tracing slows everything down
+            allocations = []
+            for _ in range(min(options['iterations'], 10)):
+                expire()
+                tracemalloc.start()
+                send()
+                allocations.append(tracemalloc.get_traced_memory()[1] / 1024)
+                tracemalloc.stop()
+
+            results[name] = {
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries': round(queries / options['iterations'], 2),
+                'alloc_kib': round(percentile(allocations, 50), 1),
+            }
+            self.stdout.write(
+                '{0:<16}{p50_ms:>10}{p95_ms:>10}{p99_ms:>10}{queries:>10}{alloc_kib:>12}'.format(
+                    name, **results[name]
+                )
+            )
+        return results
@@ -0,0 +1,301 @@
+"""
+Generates a synthetic dataset for scale testing
+"""
+###
+# Libraries
+###
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from comments.models import MAX_DEPTH, Comment, to_path_step
+from helpers.bulk import BulkWriter, reset_sequences
+from helpers.cache import GLOBAL_SCOPE, bump_versions
+from helpers.votes import hot_rank
+from posts.models import Post
+from topic.models import Topic
+
+User = get_user_model()
+
+# Words the generated titles and contents are made of
+WORDS = (
+    'pasta pizza bread cheese tomato garlic onion pepper salt sugar '
+    'river mountain forest desert ocean island valley city village road '
+    'python django query index cache server client thread commit deploy '
+    'music guitar piano drums concert album song lyrics stage tour '
+    'soccer tennis chess running cycling swimming league match score goal'
+).split()
+
+
+###
+# Helpers
+###
+def zipf_weights(count, exponent):
+    """Weights of the ranks 1 to `count` under Zipf's law."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def apportion(total, weights):
+    """Splits `total` into integer shares proportional to `weights`
+    (largest remainder method), so that they add up exactly.
+    """
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+    quotas = [total * weight / weight_sum for weight in weights]
+    shares = [int(quota) for quota in quotas]
+    by_remainder = sorted(
+        range(len(weights)), key=lambda index: shares[index] - quotas[index]
+    )
+    for index in by_remainder[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Generates users, topics, posts and comments for scale testing. '
+        'Posts are spread over topics following Zipf\'s law and comment '
+        'counts follow a Pareto distribution, so that a few topics and '
+        'posts get most of the activity. The same seed always generates '
+        'the same dataset. Rows are written in bulk with their counters, '
+        'paths and ranks already computed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--topics', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--zipf-exponent',
+            type=float,
+            default=1.1,
+            help='Skew of posts across topics and of activity across users.'
+        )
+        parser.add_argument(
+            '--pareto-alpha',
+            type=float,
+            default=1.2,
+            help='Shape of the comment counts of posts, lower meaning longer tails.'
+        )
+        parser.add_argument(
+            '--reply-ratio',
+            type=float,
+            default=0.6,
+            help='Share of comments replying to another comment.'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Age of the oldest generated post.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows written per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['topics'] < 1:
+            raise CommandError('At least one user and one topic are needed.')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Comments need posts.')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.reply_ratio = options['reply_ratio']
+        self.now = timezone.now()
+        self.since = self.now - timedelta(days=options['days'])
+        # Reused to keep text generation out of the way
+        self.titles = [self.make_text(2, 8) for _ in range(1000)]
+        self.contents = [self.make_text(5, 60) for _ in range(1000)]
+
+        self.user_ids = self.generate_users(options['users'])
+        self.author_weights = self.cumulate(
+            zipf_weights(len(self.user_ids), options['zipf_exponent'])
+        )
+
+        post_counts = apportion(
+            options['posts'],
+            zipf_weights(options['topics'], options['zipf_exponent'])
+        )
+        comment_counts = apportion(options['comments'], [
+            self.rng.paretovariate(options['pareto_alpha'])
+            for _ in range(options['posts'])
+        ])
+
+        topic_ids = self.generate_topics(post_counts)
+        posts = self.generate_posts(topic_ids, post_counts, comment_counts)
+        self.generate_comments(posts, comment_counts)
+
+        reset_sequences([User, Topic, Post, Comment])
+        bump_versions(GLOBAL_SCOPE)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Generated {0} users, {1} topics, {2} posts and {3} comments.'.format(
+                options['users'], options['topics'], options['posts'], options['comments']
+            )
+        ))
+
+    ###
+    # Randomness
+    ###
+    def cumulate(self, weights):
+        total, cumulated = 0, []
+        for weight in weights:
+            total += weight
+            cumulated.append(total)
+        return cumulated
+
+    def make_text(self, min_words, max_words):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(min_words, max_words)))
+
+    def pick_author(self):
+        return self.rng.choices(self.user_ids, cum_weights=self.author_weights)[0]
+
+    def pick_time(self, since):
+        return since + (self.now - since) * self.rng.random()
+
+    ###
+    # Writing
+    ###
+    def next_id(self, model):
+        return (model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0) + 1
+
+    def write(self, writer, rows):
+        with transaction.atomic():
+            writer.write(rows)
+
+    def generate_users(self, count):
+        writer = BulkWriter(User)
+        first_id = self.next_id(User)
+        # Unusable, and not worth hashing one per user
+        password = make_password(None)
+
+        rows = []
+        for user_id in range(first_id, first_id + count):
+            rows.append({
+                'id': user_id,
+                'username': 'generated{0}'.format(user_id),
+                'password': password,
+                'date_joined': self.since,
+            })
+            if len(rows) >= self.batch_size:
+                self.write(writer, rows)
+                rows = []
+        self.write(writer, rows)
+        self.stdout.write('{0} users'.format(count))
+        return list(range(first_id, first_id + count))
+
+    def generate_topics(self, post_counts):
+        writer = BulkWriter(Topic)
+        first_id = self.next_id(Topic)
+
+        rows = []
+        for topic_id, post_count in enumerate(post_counts, first_id):
+            rows.append({
+                'id': topic_id,
+                'title': self.rng.choice(self.titles)[:80],
+                'description': self.rng.choice(self.contents)[:140],
+                'url_name': 'generated{0}'.format(topic_id),
+                'author_id': self.pick_author(),
+                'created_at': self.since,
+                'updated_at': self.since,
+                'post_count': post_count,
+            })
+        for start in range(0, len(rows), self.batch_size):
+            self.write(writer, rows[start:start + self.batch_size])
+        self.stdout.write('{0} topics'.format(len(rows)))
+        return [row['id'] for row in rows]
+
+    def generate_posts(self, topic_ids, post_counts, comment_counts):
+        """Writes the posts of each topic and returns their ids
+        and creation dates, for their comments.
+        """
+        writer = BulkWriter(Post)
+        post_id = self.next_id(Post)
+
+        posts, rows = [], []
+        for topic_id, post_count in zip(topic_ids, post_counts):
+            for _ in range(post_count):
+                created_at = self.pick_time(self.since)
+                rows.append({
+                    'id': post_id,
+                    'topic_id': topic_id,
+                    'title': self.rng.choice(self.titles)[:80],
+                    'content': self.rng.choice(self.contents),
+                    'author_id': self.pick_author(),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'comment_count': comment_counts[len(posts)],
+                    'hot': hot_rank(0, created_at),
+                })
+                posts.append((post_id, created_at))
+                post_id += 1
+                if len(rows) >= self.batch_size:
+                    self.write(writer, rows)
+                    rows = []
+        self.write(writer, rows)
+        self.stdout.write('{0} posts'.format(len(posts)))
+        return posts
+
+    def generate_comments(self, posts, comment_counts):
+        """Writes the comments of each post, a thread at a time so
+        that reply counts are final by the time rows are written.
+        """
+        writer = BulkWriter(Comment)
+        comment_id = self.next_id(Comment)
+
+        rows, written = [], 0
+        for (post_id, post_created_at), comment_count in zip(posts, comment_counts):
+            thread = []
+            for _ in range(comment_count):
+                parent = None
+                if thread and self.rng.random() < self.reply_ratio:
+                    parent = self.rng.choice(thread)
+                    if parent['depth'] >= MAX_DEPTH:
+                        parent = None
+
+                created_at = self.pick_time(
+                    parent['created_at'] if parent else post_created_at
+                )
+                step = to_path_step(comment_id)
+                row = {
+                    'id': comment_id,
+                    'post_id': post_id,
+                    'parent_id': parent['id'] if parent else None,
+                    'path': parent['path'] + step if parent else step,
+                    'depth': parent['depth'] + 1 if parent else 0,
+                    'title': self.rng.choice(self.titles)[:80],
+                    'content': self.rng.choice(self.contents),
+                    'author_id': self.pick_author(),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'reply_count': 0,
+                }
+                if parent:
+                    parent['reply_count'] += 1
+                thread.append(row)
+                comment_id += 1
+
+            rows.extend(thread)
+            if len(rows) >= self.batch_size:
+                self.write(writer, rows)
+                written += len(rows)
+                rows = []
+                self.stdout.write('{0} comments'.format(written))
+        self.write(writer, rows)
+        self.stdout.write('{0} comments'.format(written + len(rows)))
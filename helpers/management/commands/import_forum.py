@@ -0,0 +1,279 @@
+"""
+Imports topics, posts and comments from other forums
+"""
+###
+# Libraries
+###
+import csv
+import gzip
+import json
+import os
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from comments.models import Comment
+from helpers.bulk import BulkWriter, reset_sequences
+from helpers.search import create_search_index, drop_search_index
+from posts.models import Post
+from topic.models import Topic
+
+User = get_user_model()
+
+# Models whose secondary and search indexes `--defer-indexes` drops
+INDEXED_MODELS = [
+    (Post, ['title', 'content']),
+    (Comment, ['title', 'content']),
+]
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Imports NDJSON or CSV files (optionally gzipped) of topics, posts '
+        'and comments, as written by the topic export: one record per '
+        'line (or row) with a `type` of "topic", "post" or "comment". '
+        'Records keep their ids, so parents must come before children.'
+    )
+
+    # Model, required references and copied fields of each record type
+    record_types = {
+        'topic': (Topic, [], ['title', 'description', 'url_name']),
+        'post': (Post, ['topic_id'], ['title', 'content']),
+        'comment': (Comment, ['post_id', 'parent_id'], ['title', 'content']),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Files to import, in order.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Records written per transaction.'
+        )
+        parser.add_argument(
+            '--id-offset',
+            type=int,
+            default=0,
+            help='Added to every imported id, to keep clear of existing rows.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'File recording the progress after each batch. Running the '
+                'command again with it resumes where the last run stopped.'
+            )
+        )
+        parser.add_argument(
+            '--defer-indexes',
+            action='store_true',
+            help=(
+                'Drops the secondary and search indexes of posts and comments '
+                'while importing and rebuilds them at the end.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.id_offset = options['id_offset']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = self.load_checkpoint()
+        self.writers = {
+            record_type: BulkWriter(model)
+            for record_type, (model, _, _) in self.record_types.items()
+        }
+        self.authors = {}
+
+        if options['defer_indexes'] and not self.checkpoint['indexes_deferred']:
+            self.drop_indexes()
+            self.checkpoint['indexes_deferred'] = True
+            self.save_checkpoint()
+
+        imported = 0
+        for path in options['paths']:
+            imported += self.import_file(path)
+
+        # Counters, paths, ranks, indexes and sequences
+        # are only brought up to date once
+        self.stdout.write('Filling comment paths...')
+        Comment.objects.fill_paths()
+        if self.checkpoint['indexes_deferred']:
+            self.stdout.write('Rebuilding indexes...')
+            self.create_indexes()
+        reset_sequences([User, Topic, Post, Comment])
+        call_command('rebuild_counters', batch_size=self.batch_size, stdout=self.stdout)
+
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS('Imported {0} records.'.format(imported)))
+
+    ###
+    # Checkpoints
+    ###
+    def load_checkpoint(self):
+        checkpoint = {'files': {}, 'indexes_deferred': False}
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint_file:
+                checkpoint.update(json.load(checkpoint_file))
+            self.stdout.write('Resuming from {0}.'.format(self.checkpoint_path))
+        return checkpoint
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        # Replaced in one go, so that it's never left half written
+        temporary_path = '{0}.tmp'.format(self.checkpoint_path)
+        with open(temporary_path, 'w') as checkpoint_file:
+            json.dump(self.checkpoint, checkpoint_file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    ###
+    # Reading
+    ###
+    def read_records(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        name = path[:-len('.gz')] if path.endswith('.gz') else path
+        with opener(path, 'rt', newline='') as records_file:
+            if name.endswith('.csv'):
+                for record in csv.DictReader(records_file):
+                    # CSV can't tell empty values from missing ones
+                    yield {key: value for key, value in record.items() if value != ''}
+            else:
+                for line in records_file:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def import_file(self, path):
+        """Imports the records of `path` past those already done
+        according to the checkpoint, `batch_size` at a time.
+        """
+        key = os.path.abspath(path)
+        done = self.checkpoint['files'].get(key, 0)
+        resuming = done > 0
+
+        batch, imported = [], 0
+        for index, record in enumerate(self.read_records(path)):
+            if index < done:
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                imported += self.write_batch(batch, skip_existing=resuming)
+                done += len(batch)
+                self.checkpoint['files'][key] = done
+                self.save_checkpoint()
+                self.stdout.write('{0}: {1} records'.format(path, done))
+                batch, resuming = [], False
+        if batch:
+            imported += self.write_batch(batch, skip_existing=resuming)
+            self.checkpoint['files'][key] = done + len(batch)
+            self.save_checkpoint()
+        return imported
+
+    ###
+    # Writing
+    ###
+    def write_batch(self, records, skip_existing=False):
+        """Writes `records` in one transaction, topics first, then
+        posts and comments.
+
+        The first batch after resuming may have been committed right
+        before the checkpoint was last saved, so its rows that already
+        exist are skipped.
+        """
+        rows = {record_type: [] for record_type in self.record_types}
+        for record in records:
+            record_type = record.get('type')
+            if record_type not in self.record_types:
+                raise CommandError('Unknown record type: {0!r}'.format(record_type))
+            rows[record_type].append(self.to_row(record_type, record))
+
+        with transaction.atomic():
+            self.resolve_authors(rows)
+            written = 0
+            for record_type, model_rows in rows.items():
+                if skip_existing and model_rows:
+                    model = self.record_types[record_type][0]
+                    existing = set(model.objects.filter(
+                        pk__in=[row['id'] for row in model_rows]
+                    ).values_list('pk', flat=True))
+                    model_rows = [row for row in model_rows if row['id'] not in existing]
+                written += self.writers[record_type].write(model_rows)
+        return written
+
+    def to_row(self, record_type, record):
+        _, references, fields = self.record_types[record_type]
+        try:
+            row = {'id': int(record['id']) + self.id_offset}
+            for reference in references:
+                value = record.get(reference)
+                row[reference] = None if value is None else int(value) + self.id_offset
+            for field in fields:
+                row[field] = record[field]
+            row['author_username'] = record['author_username']
+        except (KeyError, TypeError, ValueError) as exc:
+            raise CommandError('Invalid {0} record {1!r}: {2!r}'.format(
+                record_type, record.get('id'), exc
+            ))
+
+        now = timezone.now()
+        row['created_at'] = self.parse_datetime(record.get('created_at')) or now
+        row['updated_at'] = self.parse_datetime(record.get('updated_at')) or row['created_at']
+        return row
+
+    def parse_datetime(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, timezone.utc)
+        return parsed
+
+    def resolve_authors(self, rows):
+        """Sets `author_id` on every row from its `author_username`,
+        creating the users that don't exist yet (with unusable
+        passwords) with two queries per batch at most.
+        """
+        all_rows = [row for model_rows in rows.values() for row in model_rows]
+        usernames = {row['author_username'] for row in all_rows} - set(self.authors)
+        if usernames:
+            self.authors.update(User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+            missing = usernames - set(self.authors)
+            if missing:
+                User.objects.bulk_create([
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                ])
+                self.authors.update(User.objects.filter(
+                    username__in=missing
+                ).values_list('username', 'pk'))
+
+        for row in all_rows:
+            row['author_id'] = self.authors[row.pop('author_username')]
+
+    ###
+    # Schema
+    ###
+    def drop_indexes(self):
+        with connection.schema_editor() as schema_editor:
+            for model, columns in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+                drop_search_index(schema_editor, model._meta.db_table, columns)
+
+    def create_indexes(self):
+        with connection.schema_editor() as schema_editor:
+            for model, columns in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    schema_editor.add_index(model, index)
+                create_search_index(schema_editor, model._meta.db_table, columns)
+        self.checkpoint['indexes_deferred'] = False
+        self.save_checkpoint()
@@ -0,0 +1,73 @@
+"""
+Reports the import time of each module on a cold start
+"""
+###
+# Libraries
+###
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker imports until its first request is resolved
+COLD_START = (
+    'from settings.wsgi import application\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+)
+
+# Lines written by `python -X importtime`
+re_import_time = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Starts the WSGI application in a fresh interpreter, up to loading '
+        'the URL conf like the first request does, and lists the modules '
+        'that took the longest to import (including their own imports).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--prefix',
+            help='Only lists modules starting with it (e.g. "allauth").'
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', COLD_START],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True
+        )
+        if result.returncode:
+            raise CommandError('The application failed to start:\n' + result.stderr[-2000:])
+
+        imports, modules, total = [], 0, 0
+        for line in result.stderr.splitlines():
+            match = re_import_time.match(line)
+            if not match:
+                continue
+            own, cumulative, indent, module = match.groups()
+            modules += 1
+            total += int(own)
+            if options['prefix'] and not module.startswith(options['prefix']):
+                continue
+            imports.append((int(cumulative), int(own), len(indent) // 2, module))
+
+        imports.sort(reverse=True)
+        self.stdout.write('{0:>12}{1:>10}  {2}'.format('cumulative', 'self', 'module'))
+        for cumulative, own, depth, module in imports[:options['limit']]:
+            self.stdout.write('{0:>10.1f}ms{1:>8.1f}ms  {2}{3}'.format(
+                cumulative / 1000, own / 1000, '.' * depth, module
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {0} modules in {1:.1f}ms.'.format(modules, total / 1000)
+        ))
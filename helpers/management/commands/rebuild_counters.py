@@ -0,0 +1,116 @@
+"""
+Rebuilds the denormalized post and comment counters
+"""
+###
+# Libraries
+###
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from comments.models import Comment, CommentVote
+from helpers.cache import GLOBAL_SCOPE, bump_versions
+from helpers.models import Vote
+from posts.models import Post, PostVote
+from topic.models import Topic
+
+
+###
+# Command
+###
+class Command(BaseCommand):
+    help = (
+        'Recomputes the denormalized counters of topics, posts and '
+        'comments (including votes and post ranks) from the tables '
+        'they count, one primary key range at a time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of parent rows updated per statement.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        topics = self.rebuild(
+            Topic,
+            batch_size,
+            post_count=self.count(Post.objects.all(), 'topic')
+        )
+
+        post_upvotes = self.count(PostVote.objects.filter(value=Vote.UPVOTE), 'post')
+        post_downvotes = self.count(PostVote.objects.filter(value=Vote.DOWNVOTE), 'post')
+        posts = self.rebuild(
+            Post,
+            batch_size,
+            comment_count=self.count(Comment.objects.all(), 'post'),
+            upvotes=post_upvotes,
+            downvotes=post_downvotes,
+            score=post_upvotes - post_downvotes
+        )
+        self.rebuild_hot(batch_size)
+
+        comment_upvotes = self.count(CommentVote.objects.filter(value=Vote.UPVOTE), 'comment')
+        comment_downvotes = self.count(CommentVote.objects.filter(value=Vote.DOWNVOTE), 'comment')
+        comments = self.rebuild(
+            Comment,
+            batch_size,
+            reply_count=self.count(Comment.objects.all(), 'parent'),
+            upvotes=comment_upvotes,
+            downvotes=comment_downvotes,
+            score=comment_upvotes - comment_downvotes
+        )
+
+        # Counters are part of the cached responses
+        bump_versions(GLOBAL_SCOPE)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt counters of {0} topics, {1} posts and {2} comments.'.format(
+                topics, posts, comments
+            )
+        ))
+
+    def count(self, queryset, field):
+        """Returns a subquery counting the rows of `queryset` whose
+        `field` points at the row being updated.
+        """
+        counts = queryset.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    def rebuild(self, model, batch_size, **values):
+        """Updates every row of `model` with `values`, `batch_size`
+        primary keys per statement so that no single transaction
+        locks the whole table.
+        """
+        last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+
+        updated = 0
+        for start in range(0, last_pk + 1, batch_size):
+            with transaction.atomic():
+                updated += model.objects.filter(
+                    pk__gte=start,
+                    pk__lt=start + batch_size
+                ).update(**values)
+        return updated
+
+    def rebuild_hot(self, batch_size):
+        """Recomputes `Post.hot` from the rebuilt scores, which
+        takes a logarithm not every database has.
+        """
+        last_pk = Post.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        for start in range(0, last_pk + 1, batch_size):
+            with transaction.atomic():
+                posts = list(Post.objects.filter(
+                    pk__gte=start,
+                    pk__lt=start + batch_size
+                ).only('score', 'created_at'))
+                for post in posts:
+                    post.set_hot()
+                Post.objects.bulk_update(posts, ['hot'])
@@ -0,0 +1,127 @@
+"""
+Prometheus metrics
+"""
+###
+# Libraries
+###
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Label of requests that matched no route, so that
+# scanners can't grow the number of series
+UNRESOLVED_ROUTE = '<unresolved>'
+
+
+###
+# Metrics
+###
+# Values are kept in memory mapped files, one per process, whenever
+# `PROMETHEUS_MULTIPROC_DIR` is set (see `docker-entrypoint.sh`)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent answering requests, middleware included.',
+    ['route', 'method', 'status']
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'SQL queries run per request.',
+    ['route', 'method'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float('inf'))
+)
+REQUEST_QUERY_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent running SQL queries per request.',
+    ['route', 'method']
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Size of response bodies, streamed ones excluded.',
+    ['route', 'method'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float('inf'))
+)
+
+
+###
+# Middleware
+###
+class QueryRecorder:
+    """Execute wrapper counting and timing the queries of a request."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Records the latency, queries and response size of every
+    request, labeled by the name of the route it resolved to.
+
+    Goes first in `MIDDLEWARE`, so that the time spent in the
+    other middleware is included.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = getattr(resolver_match, 'url_name', None) or UNRESOLVED_ROUTE
+        method = request.method
+
+        REQUEST_LATENCY.labels(route, method, response.status_code).observe(duration)
+        REQUEST_QUERIES.labels(route, method).observe(recorder.count)
+        REQUEST_QUERY_TIME.labels(route, method).observe(recorder.duration)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route, method).observe(len(response.content))
+        return response
+
+
+###
+# Views
+###
+def metrics(request):
+    """Exposes the metrics of every worker process, to scrapers
+    sending the `METRICS_TOKEN` as a bearer token. Without one,
+    they're only exposed in debug mode.
+    """
+    if settings.METRICS_TOKEN:
+        expected = 'Bearer {0}'.format(settings.METRICS_TOKEN)
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -48,3 +48,68 @@ class Publishable(TimestampModel):
 
     def __str__(self):
         return self.title
+
+
+class Vote(TimestampModel):
+    """An abstract base model for up/down votes. Concrete
+    models add a foreign key to what's voted on, unique
+    together with `user`.
+    """
+    UPVOTE = 1
+    DOWNVOTE = -1
+    VALUE_CHOICES = (
+        (UPVOTE, _('upvote')),
+        (DOWNVOTE, _('downvote')),
+    )
+
+    user = models.ForeignKey(
+        to=get_user_model(),
+        on_delete=models.CASCADE,
+        verbose_name=_('user'),
+    )
+
+    value = models.SmallIntegerField(
+        verbose_name=_('value'),
+        choices=VALUE_CHOICES
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Votable(models.Model):
+    """An abstract base model for what users can vote on,
+    keeping vote counters and the resulting score denormalized
+    (see `helpers.votes.cast_vote`).
+
+    Concrete models must name their votes' foreign key's
+    reverse relation `votes`.
+    """
+    upvotes = models.PositiveIntegerField(
+        verbose_name=_('upvotes'),
+        default=0,
+        editable=False
+    )
+    downvotes = models.PositiveIntegerField(
+        verbose_name=_('downvotes'),
+        default=0,
+        editable=False
+    )
+    score = models.IntegerField(
+        verbose_name=_('score'),
+        default=0,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def count_vote(self, old_value, new_value):
+        """Updates the counters for a vote going from `old_value`
+        to `new_value` (0 meaning no vote) and returns the names
+        of the fields that changed.
+        """
+        self.upvotes += (new_value == Vote.UPVOTE) - (old_value == Vote.UPVOTE)
+        self.downvotes += (new_value == Vote.DOWNVOTE) - (old_value == Vote.DOWNVOTE)
+        self.score = self.upvotes - self.downvotes
+        return ['upvotes', 'downvotes', 'score']
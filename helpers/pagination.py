@@ -0,0 +1,176 @@
+"""
+Pagination helpers
+"""
+###
+# Libraries
+###
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+###
+# Pagination classes
+###
+class KeysetPagination(CursorPagination):
+    """A cursor pagination that seeks on every column of its
+    `ordering`, all descending and the last one unique (by default
+    `(created_at, id)`).
+
+    Unlike DRF's `CursorPagination`, which positions itself on a
+    single field and falls back to an offset on ties, the cursor
+    here holds the values of the last row seen, so every page is
+    an index range scan with a `LIMIT` and no `COUNT(*)`.
+    """
+    ordering = ('-created_at', '-id')
+    position_separator = '|'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering
+        ]
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse = self.cursor.reverse
+            position = self.decode_position(self.cursor.position)
+
+        # Reverse cursors walk the index the other way round and
+        # flip the page back afterwards
+        if reverse:
+            queryset = queryset.order_by(*[
+                field.lstrip('-') for field in self.ordering
+            ])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, reverse))
+
+        # One extra row tells us whether there's a page beyond this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def seek(self, position, reverse):
+        """Builds the condition that selects the rows after
+        (or, for reverse cursors, before) `position`.
+
+        `a <= x AND (a < x OR b < y)` is used instead of the plain
+        disjunction so that the leading column always bounds the
+        index range.
+        """
+        lookup = 'gt' if reverse else 'lt'
+        *fields, last = [field.name for field in self.fields]
+        *values, last_value = position
+        condition = Q(**{'{0}__{1}'.format(last, lookup): last_value})
+        for name, value in reversed(list(zip(fields, values))):
+            condition = Q(**{'{0}__{1}e'.format(name, lookup): value}) & (
+                Q(**{'{0}__{1}'.format(name, lookup): value}) | condition
+            )
+        return condition
+
+    def encode_position(self, instance):
+        return self.position_separator.join(
+            field.value_to_string(instance) for field in self.fields
+        )
+
+    def decode_position(self, position):
+        if position is None:
+            return None
+        values = position.split(self.position_separator)
+        if len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [field.to_python(value) for field, value in zip(self.fields, values)]
+        except DjangoValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self.encode_position(self.page[-1])
+        else:
+            position = self.cursor.position
+        cursor = Cursor(offset=0, reverse=False, position=position)
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self.encode_position(self.page[0])
+        else:
+            position = self.cursor.position
+        cursor = Cursor(offset=0, reverse=True, position=position)
+        return self.encode_cursor(cursor)
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """Behaves as the default `PageNumberPagination` unless the
+    client opts in to keyset pagination with `?paginate=cursor`.
+
+    Keyset pages come newest first, seeking on the queryset's own
+    ordering, so the cursor mode is only available for the
+    orderings in `keyset_orderings`: combining it with any other
+    `ordering`, a `sort` other than `new` or a `search` (ranked by
+    relevance) is rejected rather than reordered.
+    """
+    mode_query_param = 'paginate'
+    keyset_mode = 'cursor'
+    keyset_pagination_class = KeysetPagination
+    # Ids don't always follow creation times (e.g. imported rows),
+    # so each ordering gets a cursor of its own columns
+    keyset_orderings = (
+        ('-id',),
+        ('-created_at', '-id'),
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == self.keyset_mode:
+            ordering = tuple(queryset.query.order_by)
+            if ordering not in self.keyset_orderings:
+                raise ValidationError({
+                    self.mode_query_param: 'Cursor pagination only lists newest first, '
+                                           'without a search, sort or ordering.'
+                })
+            self.keyset = self.keyset_pagination_class()
+            self.keyset.ordering = ordering
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
@@ -0,0 +1,126 @@
+"""
+Read replica helpers
+"""
+###
+# Libraries
+###
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from .cache import GLOBAL_SCOPE, get_version_timestamp, get_versions, is_shared_cache
+
+# Database reads of the current thread go to, if any
+_state = threading.local()
+
+
+###
+# Helpers
+###
+def get_read_database():
+    return getattr(_state, 'database', None)
+
+
+def set_read_database(alias):
+    _state.database = alias
+
+
+def pin_key(user_id):
+    return 'replica:pin:{0}'.format(user_id)
+
+
+def get_pin_cache():
+    return caches[settings.DATABASE_READ_REPLICA_PIN_CACHE_ALIAS]
+
+
+def pin_to_primary(user):
+    """Sends the reads of `user` to the primary database for the
+    next `DATABASE_READ_REPLICA_LAG` seconds, so that they see
+    their own writes before the replica does.
+    """
+    get_pin_cache().set(pin_key(user.pk), True, settings.DATABASE_READ_REPLICA_LAG)
+
+
+def is_pinned_to_primary(user):
+    """Tells whether `user` wrote recently. Users may write through
+    any worker, so without a shared cache to tell, any of them might.
+    """
+    if not user.is_authenticated:
+        return False
+    if not is_shared_cache(settings.DATABASE_READ_REPLICA_PIN_CACHE_ALIAS):
+        return True
+    return get_pin_cache().get(pin_key(user.pk)) is not None
+
+
+###
+# Routers
+###
+class ReplicaRouter:
+    """Sends reads to the database set by `set_read_database` (see
+    `ReplicaReadMixin`) and every write to the primary one, even
+    for instances read from the replica.
+    """
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows
+        return True
+
+
+###
+# Mixins
+###
+class ReplicaReadMixin:
+    """Reads safe requests from `DATABASE_READ_REPLICA`, when set,
+    without a transaction. Other requests run in one on the primary
+    database, like `ATOMIC_REQUESTS` would, and pin their user to
+    it for a while (see `pin_to_primary`).
+
+    Responses read from the replica aren't cached while the cache
+    versions they depend on are more recent than the replica lag
+    allows, since they may be missing the writes that bumped them.
+    """
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        # Transactions are up to `dispatch`
+        return transaction.non_atomic_requests(super().as_view(*args, **kwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            try:
+                return super().dispatch(request, *args, **kwargs)
+            finally:
+                set_read_database(None)
+
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code < 400 and self.request.user.is_authenticated:
+            pin_to_primary(self.request.user)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication runs on the primary database
+        super().initial(request, *args, **kwargs)
+        replica = settings.DATABASE_READ_REPLICA
+        if replica and request.method in SAFE_METHODS and not is_pinned_to_primary(request.user):
+            set_read_database(replica)
+
+    def should_cache_response(self, response):
+        if not super().should_cache_response(response):
+            return False
+        if get_read_database() is None:
+            return True
+        if not is_shared_cache(settings.RESPONSE_CACHE_ALIAS):
+            # Versions may not tell about other workers' writes
+            return False
+        versions = get_versions([GLOBAL_SCOPE] + self.get_cache_scopes())
+        last_write = max(get_version_timestamp(version) for version in versions)
+        return time.time() - last_write > settings.DATABASE_READ_REPLICA_LAG
@@ -0,0 +1,240 @@
+"""
+Full-text search helpers
+"""
+###
+# Libraries
+###
+import re
+
+from django.db import connections, migrations, router
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+# Text search configuration of the PostgreSQL vectors and queries
+SEARCH_CONFIG = 'pg_catalog.english'
+# Column holding the vectors on PostgreSQL
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+
+###
+# Schema
+###
+def search_table(table):
+    """Name of the FTS5 table indexing `table` on SQLite."""
+    return '{0}_search'.format(table)
+
+
+def create_search_index(schema_editor, table, columns):
+    """Indexes the text in `columns` of `table`, keeping it up to
+    date from triggers so that every write path (`save`, `update`,
+    `bulk_create`, raw SQL) is covered.
+
+    PostgreSQL gets a `tsvector` column with a GIN index, SQLite an
+    external content FTS5 table. Other backends get nothing and are
+    searched with `icontains` instead (see `FullTextSearchFilter`).
+    """
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE {table} ADD COLUMN {vector} tsvector'.format(
+                table=quote(table), vector=quote(SEARCH_VECTOR_COLUMN)
+            )
+        )
+        schema_editor.execute(
+            'UPDATE {table} SET {vector} = to_tsvector(%s, {document})'.format(
+                table=quote(table),
+                vector=quote(SEARCH_VECTOR_COLUMN),
+                document=" || ' ' || ".join(
+                    "coalesce({0}, '')".format(quote(column)) for column in columns
+                )
+            ),
+            [SEARCH_CONFIG]
+        )
+        schema_editor.execute(
+            'CREATE INDEX {index} ON {table} USING gin ({vector})'.format(
+                index=quote('{0}_search_idx'.format(table)),
+                table=quote(table),
+                vector=quote(SEARCH_VECTOR_COLUMN)
+            )
+        )
+        schema_editor.execute(
+            'CREATE TRIGGER {trigger} BEFORE INSERT OR UPDATE ON {table} '
+            'FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger'
+            "({vector}, '{config}', {columns})".format(
+                trigger=quote('{0}_search_trigger'.format(table)),
+                table=quote(table),
+                vector=SEARCH_VECTOR_COLUMN,
+                config=SEARCH_CONFIG,
+                columns=', '.join(columns)
+            )
+        )
+
+    elif vendor == 'sqlite':
+        fts = search_table(table)
+        new_values = ', '.join('new.{0}'.format(quote(column)) for column in columns)
+        old_values = ', '.join('old.{0}'.format(quote(column)) for column in columns)
+        column_names = ', '.join(quote(column) for column in columns)
+
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE {fts} USING fts5({columns}, "
+            "content='{table}', content_rowid='id')".format(
+                fts=quote(fts), columns=column_names, table=table
+            )
+        )
+        schema_editor.execute(
+            'CREATE TRIGGER {trigger} AFTER INSERT ON {table} BEGIN '
+            'INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new}); '
+            'END'.format(
+                trigger=quote('{0}_ai'.format(fts)), table=quote(table),
+                fts=quote(fts), columns=column_names, new=new_values
+            )
+        )
+        schema_editor.execute(
+            'CREATE TRIGGER {trigger} AFTER DELETE ON {table} BEGIN '
+            "INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+            'END'.format(
+                trigger=quote('{0}_ad'.format(fts)), table=quote(table),
+                fts=quote(fts), columns=column_names, old=old_values
+            )
+        )
+        schema_editor.execute(
+            'CREATE TRIGGER {trigger} AFTER UPDATE ON {table} BEGIN '
+            "INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+            'INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new}); '
+            'END'.format(
+                trigger=quote('{0}_au'.format(fts)), table=quote(table),
+                fts=quote(fts), columns=column_names, old=old_values, new=new_values
+            )
+        )
+        schema_editor.execute(
+            "INSERT INTO {fts} ({fts}) VALUES ('rebuild')".format(fts=quote(fts))
+        )
+
+
+def drop_search_index(schema_editor, table, columns):
+    """Reverts `create_search_index`."""
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP TRIGGER {trigger} ON {table}'.format(
+            trigger=quote('{0}_search_trigger'.format(table)), table=quote(table)
+        ))
+        schema_editor.execute('ALTER TABLE {table} DROP COLUMN {vector}'.format(
+            table=quote(table), vector=quote(SEARCH_VECTOR_COLUMN)
+        ))
+
+    elif vendor == 'sqlite':
+        fts = search_table(table)
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute('DROP TRIGGER {0}'.format(
+                quote('{0}_{1}'.format(fts, suffix))
+            ))
+        schema_editor.execute('DROP TABLE {0}'.format(quote(fts)))
+
+
+def keep_search_index(table, columns):
+    """Returns the `RunPython` operations to place before and after
+    migration operations that make SQLite remake `table` (e.g. adding
+    columns), which drops the triggers feeding its FTS5 table.
+    """
+    def drop(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            drop_search_index(schema_editor, table, columns)
+
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            create_search_index(schema_editor, table, columns)
+
+    return (
+        migrations.RunPython(drop, create),
+        migrations.RunPython(create, drop),
+    )
+
+
+###
+# Queries
+###
+def to_fts5_query(text):
+    """Turns free text into an FTS5 query matching rows with every
+    word, so that operators and quotes typed by users are taken
+    literally instead of failing as syntax errors.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join('"{0}"'.format(word) for word in words)
+
+
+###
+# Filter backends
+###
+class FullTextSearchFilter(BaseFilterBackend):
+    """Filters on the `search` query parameter against the index
+    built by `create_search_index`, most relevant results first.
+
+    Ranking replaces whatever ordering earlier backends applied,
+    which is only kept to break ties, so this backend must come
+    after `OrderingFilter`. Views list their indexed fields in
+    `search_fields`; backends without an index fall back to an
+    `icontains` lookup on them.
+    """
+    search_param = 'search'
+
+    def get_search_text(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+
+        model = queryset.model
+        table = model._meta.db_table
+        pk_column = model._meta.pk.column
+        vendor = connections[router.db_for_read(model)].vendor
+
+        if vendor == 'postgresql':
+            matches = RawSQL(
+                'SELECT {pk} FROM {table} WHERE {vector} @@ '
+                'plainto_tsquery(%s, %s)'.format(
+                    pk=pk_column, table=table, vector=SEARCH_VECTOR_COLUMN
+                ),
+                [SEARCH_CONFIG, text]
+            )
+            rank = RawSQL(
+                'ts_rank({table}.{vector}, plainto_tsquery(%s, %s))'.format(
+                    table=table, vector=SEARCH_VECTOR_COLUMN
+                ),
+                [SEARCH_CONFIG, text],
+                output_field=FloatField()
+            )
+
+        elif vendor == 'sqlite':
+            query = to_fts5_query(text)
+            if not query:
+                return queryset.none()
+            fts = search_table(table)
+            matches = RawSQL(
+                'SELECT rowid FROM {fts} WHERE {fts} MATCH %s'.format(fts=fts),
+                [query]
+            )
+            # FTS5's `rank` is a bm25 score, lower meaning more relevant
+            rank = RawSQL(
+                'SELECT -rank FROM {fts} WHERE {fts} MATCH %s '
+                'AND rowid = {table}.{pk}'.format(fts=fts, table=table, pk=pk_column),
+                [query],
+                output_field=FloatField()
+            )
+
+        else:
+            condition = Q()
+            for field in view.search_fields:
+                condition |= Q(**{'{0}__icontains'.format(field): text})
+            return queryset.filter(condition)
+
+        ordering = queryset.query.order_by or model._meta.ordering
+        return queryset.filter(pk__in=matches).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', *ordering)
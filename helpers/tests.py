@@ -0,0 +1,798 @@
+"""
+Helpers testing
+"""
+###
+# Libraries
+###
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.http.request import validate_host
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from settings import environment
+from comments.models import Comment, to_path_step
+from posts.models import Post, PostVote
+from posts.views import PostViewSet
+from topic.models import Topic
+from topic.views import TopicViewSet
+from .cache import TOPICS_SCOPE, bump_versions, get_cache
+from .checks import check_shared_caches, check_viewset_indexes
+from .health_check_view import is_ready
+from .pagination import PageNumberOrKeysetPagination
+from .management.commands.benchmark import compare
+from .management.commands.generate_dataset import apportion, zipf_weights
+from .votes import hot_rank
+from .wsgi import HealthCheckApplication
+
+
+User = get_user_model()
+
+###
+# Test Cases
+###
+class RebuildCountersTestCase(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.topic2 = Topic.objects.create(
+            title='Title 2',
+            author=self.user1,
+            description='Description',
+            url_name='title2'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        self.comment1 = Comment.objects.create(
+            title='Title 1',
+            author=self.user1,
+            content='A smart addendum 1',
+            post=self.post1
+        )
+        Comment.objects.create(
+            title='Title 2',
+            author=self.user1,
+            content='A smart addendum 2',
+            post=self.post1,
+            parent=self.comment1
+        )
+
+    def test_rebuild_counters(self):
+        """Tests that drifted counters are recomputed from
+        the posts and comments tables.
+        """
+        Topic.objects.update(post_count=7)
+        Post.objects.update(comment_count=7, hot=0)
+        Comment.objects.update(reply_count=7)
+        PostVote.objects.create(post=self.post1, user=self.user1, value=-1)
+
+        call_command('rebuild_counters', batch_size=1, stdout=StringIO())
+
+        self.topic1.refresh_from_db()
+        self.topic2.refresh_from_db()
+        self.post1.refresh_from_db()
+        self.assertEqual(self.topic1.post_count, 2)
+        self.assertEqual(self.topic2.post_count, 0)
+        self.assertEqual(self.post1.comment_count, 2)
+        self.assertEqual(
+            (self.post1.upvotes, self.post1.downvotes, self.post1.score),
+            (0, 1, -1)
+        )
+        self.assertEqual(self.post1.hot, hot_rank(-1, self.post1.created_at))
+        self.assertEqual(
+            Post.objects.exclude(pk=self.post1.pk).get().comment_count,
+            0
+        )
+        self.assertEqual(
+            list(Comment.objects.order_by('id').values_list('reply_count', flat=True)),
+            [1, 0]
+        )
+
+
+class ViewSetIndexCheckTestCase(SimpleTestCase):
+    def test_registered_viewsets_are_indexed(self):
+        """Tests that every viewset on the routers filters and
+        orders on indexed columns.
+        """
+        self.assertEqual(check_viewset_indexes(), [])
+
+    def test_unindexed_ordering(self):
+        """Tests that ordering a nested listing by a column
+        without a supporting index is reported.
+        """
+        class UnindexedPostViewSet(PostViewSet):
+            ordering = '-title'
+
+        errors = check_viewset_indexes(viewsets=[UnindexedPostViewSet])
+
+        self.assertEqual([error.id for error in errors], ['helpers.E002'])
+        self.assertIn('(topic_id)', errors[0].msg)
+        self.assertIn('(title)', errors[0].msg)
+
+    def test_unrestricted_ordering_fields(self):
+        """Tests that letting clients order by any field is
+        reported.
+        """
+        class UnrestrictedPostViewSet(PostViewSet):
+            ordering_fields = '__all__'
+
+        errors = check_viewset_indexes(viewsets=[UnrestrictedPostViewSet])
+
+        self.assertEqual([error.id for error in errors], ['helpers.E001'])
+
+    def test_unindexed_sort(self):
+        class UnindexedSortPostViewSet(PostViewSet):
+            sort_orderings = {'controversial': ('-downvotes', '-id')}
+
+        errors = check_viewset_indexes(viewsets=[UnindexedSortPostViewSet])
+
+        self.assertEqual([error.id for error in errors], ['helpers.E002'])
+        self.assertIn('(downvotes, id)', errors[0].msg)
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+    def test_local_memory_cache_in_deployments(self):
+        """Tests that deployments, running several worker processes,
+        can't keep the response cache in local memory.
+        """
+        self.assertEqual(check_shared_caches(), [])
+
+        with override_settings(LOCAL_MEMORY_CACHE_SHARED=False):
+            errors = check_shared_caches()
+        self.assertEqual({error.id for error in errors}, {'helpers.E003'})
+        self.assertIn('RESPONSE_CACHE_ALIAS', errors[0].msg)
+        self.assertIn('AUTH_TOKEN_CACHE_ALIAS', errors[1].msg)
+        self.assertIn('DATABASE_READ_REPLICA_PIN_CACHE_ALIAS', errors[2].msg)
+
+        with override_settings(
+            LOCAL_MEMORY_CACHE_SHARED=False,
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': tempfile.gettempdir(),
+            }}
+        ):
+            self.assertEqual(check_shared_caches(), [])
+
+
+class ResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.url = reverse('post-list', args=[self.topic1.url_name])
+
+    def test_cached_response_skips_the_database(self):
+        """Tests that a repeated request is answered from the
+        cache, validators included, without querying the posts.
+        """
+        for url in [self.url, '{0}?paginate=cursor'.format(self.url)]:
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(url)
+
+            self.assertEqual(second.data, first.data)
+            self.assertEqual([
+                query['sql'] for query in queries if 'posts_post' in query['sql']
+            ], [])
+
+    def test_writes_expire_cached_responses(self):
+        """Tests that new comments expire their post's
+        listing, which shows comment counts.
+        """
+        self.client.get(self.url)
+        Comment.objects.create(
+            title='Title 1',
+            author=self.user1,
+            content='A smart addendum 1',
+            post=self.post1
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['results'][0]['comment_count'], 1)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'localhost'])
+    @mock.patch.object(PageNumberOrKeysetPagination, 'page_size', 1)
+    def test_responses_are_cached_per_host(self):
+        """Tests that absolute pagination links built for one
+        host aren't served to clients of another.
+        """
+        Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        self.client.get(self.url)
+
+        response = self.client.get(self.url, SERVER_NAME='localhost')
+        self.assertTrue(response.data['next'].startswith('http://localhost/'))
+
+    def test_renaming_topic_expires_previous_url(self):
+        """Tests that a topic's responses under its previous
+        URL name aren't served after a rename.
+        """
+        url = reverse('topic-detail', args=[self.topic1.url_name])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        topic = Topic.objects.get(pk=self.topic1.pk)
+        topic.url_name = 'renamed'
+        topic.save()
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_stale_response_served_while_refreshing(self):
+        """Tests that, while a request recomputes an expired
+        response, the others get the stale one instead of
+        hitting the database.
+        """
+        view = TopicViewSet(action='list', kwargs={})
+        request = Request(APIRequestFactory().get('/topics/'))
+        key = view.get_cache_key(request)
+        get_cache().set(key, (0, {'stale': True}), 60)
+        get_cache().add('{0}:lock'.format(key), 1, 60)
+        handler = mock.Mock()
+
+        response = view.get_cached_response(handler, request)
+
+        self.assertEqual(response.data, {'stale': True})
+        handler.assert_not_called()
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.url = reverse('post-list', args=[self.topic1.url_name])
+
+    def test_matching_etag_is_not_modified(self):
+        """Tests that polling with the last `ETag` gets a 304
+        until something changes.
+        """
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Comment.objects.create(
+            title='Title 1',
+            author=self.user1,
+            content='A smart addendum 1',
+            post=self.post1
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(LOCAL_MEMORY_CACHE_SHARED=False)
+    def test_unshared_cache(self):
+        """Tests that lists have no validators when other workers'
+        writes may not have bumped the versions this one sees.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unmodified_since(self):
+        """Tests that polling with the last `Last-Modified` of
+        a post gets a 304.
+        """
+        url = reverse('post-detail', args=[self.topic1.url_name, self.post1.id])
+        response = self.client.get(url)
+
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_object(self):
+        """Tests that missing objects still get a 404."""
+        url = reverse('post-detail', args=[self.topic1.url_name, 0])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"anything"')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ImportForumTestCase(TestCase):
+    records = [
+        {'type': 'topic', 'id': 1, 'title': 'Title 1', 'description': 'Description',
+         'url_name': 'title1', 'author_username': 'alice',
+         'created_at': '2015-01-01T10:00:00Z'},
+        {'type': 'post', 'id': 1, 'topic_id': 1, 'title': 'Post 1',
+         'content': 'Imported content', 'author_username': 'alice',
+         'created_at': '2015-01-02T10:00:00Z'},
+        {'type': 'post', 'id': 2, 'topic_id': 1, 'title': 'Post 2',
+         'content': 'Rich content 2', 'author_username': 'user1'},
+        {'type': 'comment', 'id': 1, 'post_id': 1, 'parent_id': None,
+         'title': 'Title 1', 'content': 'A smart addendum 1', 'author_username': 'bob'},
+        {'type': 'comment', 'id': 2, 'post_id': 1, 'parent_id': 1,
+         'title': 'Title 2', 'content': 'A smart addendum 2', 'author_username': 'alice'},
+    ]
+
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_records(self, name, records):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as records_file:
+            for record in records:
+                records_file.write(json.dumps(record) + '\n')
+        return path
+
+    def assert_imported(self):
+        topic = Topic.objects.get(url_name='title1')
+        self.assertEqual(topic.author.username, 'alice')
+        self.assertEqual(topic.created_at.year, 2015)
+        self.assertEqual(topic.post_count, 2)
+        self.assertEqual(
+            Post.objects.get(pk=2).author_id,
+            self.user1.pk
+        )
+        self.assertEqual(Post.objects.get(pk=1).comment_count, 2)
+
+        reply = Comment.objects.get(pk=2)
+        self.assertEqual(reply.path, to_path_step(1) + to_path_step(2))
+        self.assertEqual(reply.depth, 1)
+        self.assertEqual(reply.parent.reply_count, 1)
+
+    def test_import(self):
+        """Tests that records keep their ids and timestamps, that
+        authors are mapped (or created) and that counters and
+        paths are computed.
+        """
+        path = self.write_records('forum.ndjson', self.records)
+
+        call_command('import_forum', path, batch_size=2, stdout=StringIO())
+
+        self.assert_imported()
+        self.assertTrue(User.objects.filter(username='bob').exists())
+        # The next post doesn't collide with the imported ids
+        post = Post.objects.create(
+            author=self.user1,
+            title='Post 3',
+            content='Rich content 3',
+            topic_id=1
+        )
+        self.assertGreater(post.pk, 2)
+
+    def test_resume_from_checkpoint(self):
+        """Tests that records already done according to the
+        checkpoint aren't imported again.
+        """
+        path = self.write_records('forum.ndjson', self.records)
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        call_command(
+            'import_forum',
+            self.write_records('topics.ndjson', self.records[:1]),
+            stdout=StringIO()
+        )
+        with open(checkpoint, 'w') as checkpoint_file:
+            json.dump({'files': {os.path.abspath(path): 1}}, checkpoint_file)
+
+        call_command(
+            'import_forum',
+            path,
+            checkpoint=checkpoint,
+            batch_size=2,
+            stdout=StringIO()
+        )
+
+        self.assert_imported()
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class ImportForumDeferredIndexesTestCase(TransactionTestCase):
+    def test_defer_indexes(self):
+        """Tests that dropped indexes, search included, are
+        back after the import.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as records_file:
+            for record in ImportForumTestCase.records:
+                records_file.write(json.dumps(record) + '\n')
+        self.addCleanup(os.remove, records_file.name)
+
+        call_command(
+            'import_forum',
+            records_file.name,
+            defer_indexes=True,
+            stdout=StringIO()
+        )
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+        self.assertIn('post_topic_hot_idx', constraints)
+        response = self.client.get(
+            reverse('post-list', args=['title1']),
+            {'search': 'imported'}
+        )
+        self.assertEqual([post['id'] for post in response.data['results']], [1])
+
+
+class GenerateDatasetTestCase(TestCase):
+    def test_apportion(self):
+        shares = apportion(100, zipf_weights(7, 1.1))
+        self.assertEqual(sum(shares), 100)
+        self.assertEqual(shares, sorted(shares, reverse=True))
+
+    def test_generate_dataset(self):
+        """Tests that the generated rows come with consistent
+        counters and paths.
+        """
+        call_command(
+            'generate_dataset',
+            users=5,
+            topics=3,
+            posts=20,
+            comments=200,
+            seed=1,
+            batch_size=50,
+            stdout=StringIO()
+        )
+
+        self.assertEqual(User.objects.count(), 5)
+        topics = Topic.objects.annotate(total=Count('post')).order_by('pk')
+        self.assertEqual([topic.post_count for topic in topics], [topic.total for topic in topics])
+        self.assertGreater(topics[0].post_count, topics[2].post_count)
+        for post in Post.objects.annotate(total=Count('comment')):
+            self.assertEqual(post.comment_count, post.total)
+
+        self.assertEqual(Comment.objects.count(), 200)
+        for comment in Comment.objects.annotate(total=Count('replies')).select_related('parent'):
+            self.assertEqual(comment.reply_count, comment.total)
+            self.assertTrue(comment.path.endswith(to_path_step(comment.pk)))
+            if comment.parent:
+                self.assertTrue(comment.path.startswith(comment.parent.path))
+                self.assertEqual(comment.depth, comment.parent.depth + 1)
+
+
+class BenchmarkTestCase(TestCase):
+    def test_compare(self):
+        """Tests that extra queries and allocations are flagged,
+        but not slower tails.
+        """
+        baseline = {'post-list': {'p50_ms': 2, 'p95_ms': 3, 'queries': 2, 'alloc_kib': 100}}
+        results = {'post-list': {'p50_ms': 2, 'p95_ms': 30, 'queries': 2, 'alloc_kib': 105}}
+        self.assertEqual(compare(results, baseline, 1.0, 0.1), [])
+
+        results['post-list'].update(queries=3, alloc_kib=120)
+        self.assertEqual(len(compare(results, baseline, 1.0, 0.1)), 2)
+
+    def test_benchmark(self):
+        call_command(
+            'generate_dataset',
+            users=5,
+            topics=2,
+            posts=10,
+            comments=50,
+            stdout=StringIO()
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            options = {
+                'current_database': True,
+                'iterations': 3,
+                'warmup': 1,
+                'baseline': baseline,
+                'stdout': StringIO(),
+            }
+            call_command('benchmark', save_baseline=True, **options)
+            with open(baseline) as baseline_file:
+                scenarios = json.load(baseline_file)['scenarios']
+            self.assertIn('comment-create', scenarios)
+            self.assertEqual(
+                set(scenarios['topic-list']),
+                {'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'alloc_kib'}
+            )
+
+            # Only queries are stable enough to compare here
+            call_command('benchmark', tolerance=100, alloc_tolerance=100, **options)
+
+
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+
+    def get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_recorded_by_route(self):
+        labels = {'route': 'post-list', 'method': 'GET'}
+        requests = self.get_sample('http_request_duration_seconds_count', status='200', **labels)
+        queries = self.get_sample('http_request_db_queries_sum', **labels)
+
+        self.client.get(reverse('post-list', args=[self.topic1.url_name]))
+
+        self.assertEqual(
+            self.get_sample('http_request_duration_seconds_count', status='200', **labels),
+            requests + 1
+        )
+        self.assertGreater(self.get_sample('http_request_db_queries_sum', **labels), queries)
+        self.assertGreater(self.get_sample('http_response_size_bytes_count', **labels), 0)
+
+    @override_settings(DEBUG=True, METRICS_TOKEN=None)
+    def test_metrics(self):
+        self.client.get(reverse('topic-list'))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'route="topic-list"', response.content)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_without_token(self):
+        """Tests that metrics are private by default outside of
+        debug mode.
+        """
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class HealthCheckTestCase(SimpleTestCase):
+    def setUp(self):
+        self.application = mock.Mock(return_value=[b'Django'])
+        self.wsgi = HealthCheckApplication(self.application)
+        is_ready.checked_at = None
+        self.addCleanup(setattr, is_ready, 'checked_at', None)
+
+    def call(self, path):
+        start_response = mock.Mock()
+        body = b''.join(self.wsgi({'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}, start_response))
+        return start_response.call_args[0][0], body
+
+    def test_health_check_skips_django(self):
+        self.assertEqual(self.call('/health-check/'), ('200 OK', b'Health Check'))
+        self.application.assert_not_called()
+
+    def test_other_paths_reach_django(self):
+        start_response = mock.Mock()
+        self.assertEqual(self.wsgi({'PATH_INFO': '/topics/'}, start_response), [b'Django'])
+
+    def test_ready_is_cached(self):
+        with mock.patch.object(is_ready, 'check_database', return_value=True) as check:
+            self.assertEqual(self.call('/ready/'), ('200 OK', b'Ready'))
+            self.assertEqual(self.call('/ready/'), ('200 OK', b'Ready'))
+        self.assertEqual(check.call_count, 1)
+        self.application.assert_not_called()
+
+    def test_not_ready(self):
+        with mock.patch('helpers.health_check_view.connection') as mocked_connection:
+            mocked_connection.cursor.side_effect = DatabaseError
+            self.assertEqual(self.call('/ready/'), ('503 Service Unavailable', b'Not Ready'))
+
+    def test_ready_view(self):
+        with mock.patch.object(is_ready, 'check_database', return_value=False):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class EnvironmentTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'env-cache.json')
+
+    @mock.patch('settings.environment.get_ec2_private_ip', return_value='10.0.0.1')
+    @mock.patch('settings.environment.get_s3_variables', return_value={'SECRET_KEY': 'secret'})
+    def test_cache_is_loaded_without_s3(self, get_s3_variables, get_ec2_private_ip):
+        environment.write_environment_cache('production', path=self.path)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+        with mock.patch.dict(os.environ), mock.patch('s3_environ.S3Environ') as s3_environ:
+            environment.load_environment('production', path=self.path)
+            self.assertEqual(os.environ['SECRET_KEY'], 'secret')
+            self.assertEqual(os.environ['EC2_PRIVATE_IP'], '10.0.0.1')
+        s3_environ.assert_not_called()
+
+    def test_missing_cache_falls_back_to_s3(self):
+        with mock.patch('s3_environ.S3Environ') as s3_environ:
+            environment.load_environment('staging', path=self.path)
+        s3_environ.assert_called_once_with(bucket='bucket-env', key='envs-staging.json')
+
+    def test_allowed_hosts_discovery(self):
+        """Tests that the private IP is only looked up, once, for
+        hosts matching none of the other entries.
+        """
+        discover = mock.Mock(return_value='10.0.0.1')
+        allowed_hosts = environment.AllowedHosts(['localhost'], discover=discover)
+
+        self.assertTrue(validate_host('localhost', allowed_hosts))
+        discover.assert_not_called()
+        self.assertTrue(validate_host('10.0.0.1', allowed_hosts))
+        self.assertFalse(validate_host('example.com', allowed_hosts))
+        discover.assert_called_once_with()
+
+
+class ProfileImportsTestCase(SimpleTestCase):
+    def test_profile_imports(self):
+        stdout = StringIO()
+        call_command('profile_imports', limit=200, stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn('settings.wsgi', output)
+        # Deferred until first used
+        self.assertNotIn('accounts.custom_providers', output)
+        self.assertNotIn('boto3', output)
+
+
+@override_settings(DATABASE_READ_REPLICA='replica')
+class ReplicaTestCase(APITestCase):
+    """Runs against two databases, standing in for a primary and
+    a replica that hasn't caught up with it.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        get_cache().clear()
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        Token.objects.create(user=self.user1)
+        Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        replica_user = User.objects.using('replica').create(
+            pk=self.user1.pk,
+            username='user1',
+            password='userrules'
+        )
+        Topic.objects.using('replica').create(
+            title='Title 1',
+            author=replica_user,
+            description='Description',
+            url_name='replica1'
+        )
+
+    def get_url_names(self):
+        response = self.client.get(reverse('topic-list'))
+        return [topic['url_name'] for topic in response.data['results']]
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.get_url_names(), ['replica1'])
+
+    def test_writes_go_to_primary_and_pin_their_user(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+        response = self.client.post(reverse('topic-list'), {
+            'title': 'Title 2',
+            'description': 'Description',
+            'url_name': 'title2',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Topic.objects.using('default').filter(url_name='title2').exists())
+        self.assertFalse(Topic.objects.using('replica').filter(url_name='title2').exists())
+
+        # Reads their own writes...
+        self.assertEqual(sorted(self.get_url_names()), ['title1', 'title2'])
+        # ...unlike everyone else (once the cached response is gone)
+        get_cache().clear()
+        self.client.credentials()
+        self.assertEqual(self.get_url_names(), ['replica1'])
+
+    @override_settings(LOCAL_MEMORY_CACHE_SHARED=False)
+    def test_unshared_pin_cache(self):
+        """Tests that, without a shared cache telling which users
+        wrote recently, authenticated users read from the primary.
+        """
+        self.assertEqual(self.get_url_names(), ['replica1'])
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+        self.assertEqual(self.get_url_names(), ['title1'])
+
+    def test_safe_requests_skip_transactions(self):
+        atomic_blocks = []
+        get_queryset = TopicViewSet.get_queryset
+
+        def record_atomic_blocks(view):
+            atomic_blocks.append(len(connection.savepoint_ids))
+            return get_queryset(view)
+
+        with mock.patch.object(TopicViewSet, 'get_queryset', record_atomic_blocks):
+            self.client.get(reverse('topic-list'))
+        self.assertEqual(atomic_blocks[0], len(connection.savepoint_ids))
+
+    def test_recently_written_responses_are_not_cached(self):
+        """Tests that responses read from the replica right after a
+        write aren't cached, as they may be missing it.
+        """
+        bump_versions(TOPICS_SCOPE)
+        self.client.get(reverse('topic-list'))
+
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.client.get(reverse('topic-list'))
+        self.assertGreater(len(queries), 1)
@@ -0,0 +1,167 @@
+"""
+Voting helpers
+"""
+###
+# Libraries
+###
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from rest_framework import permissions, serializers
+from rest_framework.decorators import action
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.response import Response
+
+from .models import Vote
+
+# Reddit's epoch and decay: a score 10 times higher makes up
+# for being posted 12.5 hours earlier
+HOT_EPOCH = 1134028003
+HOT_DECAY = 45000
+
+
+###
+# Helpers
+###
+def hot_rank(score, created_at):
+    """Reddit's "hot" rank. It only depends on the score and the
+    creation time, so it can be stored and indexed, and only has
+    to change when a vote does.
+    """
+    order = math.log10(max(abs(score), 1))
+    sign = (score > 0) - (score < 0)
+    seconds = created_at.timestamp() - HOT_EPOCH
+    return round(sign * order + seconds / HOT_DECAY, 7)
+
+
+def discount_votes(model, votes):
+    """Takes `votes` (a queryset of votes on the `Votable`
+    `model`, about to be deleted) out of their targets' counters,
+    with a single update grouping them by target. Returns the
+    targets as a queryset, which is empty once `votes` are gone.
+    """
+    field = model.votes.field.name
+    totals = votes.filter(**{field: OuterRef('pk')}).order_by().values(field)
+
+    def total(aggregate):
+        return Coalesce(Subquery(totals.annotate(total=aggregate).values('total')), 0)
+
+    targets = model.objects.filter(pk__in=votes.values(field))
+    targets.update(
+        upvotes=Greatest(F('upvotes') - total(Count('pk', filter=Q(value=Vote.UPVOTE))), 0),
+        downvotes=Greatest(F('downvotes') - total(Count('pk', filter=Q(value=Vote.DOWNVOTE))), 0),
+        score=F('score') - total(Sum('value'))
+    )
+    return targets
+
+
+def cast_vote(target, user, value):
+    """Sets `user`'s vote on the `Votable` `target` to `value`
+    (0 taking it back) and updates its counters in the same
+    transaction. Returns `target` as updated.
+
+    The target's row is locked first, so that concurrent votes
+    on it are counted one after the other.
+    """
+    model = type(target)
+    with transaction.atomic():
+        target = model.objects.select_for_update().get(pk=target.pk)
+        vote = target.votes.filter(user=user).first()
+        old_value = vote.value if vote is not None else 0
+        if value == old_value:
+            return target
+
+        if vote is None:
+            target.votes.create(user=user, value=value)
+        elif not value:
+            vote.delete()
+        else:
+            vote.value = value
+            vote.save(update_fields=['value', 'updated_at'])
+
+        fields = target.count_vote(old_value, value)
+        if value:
+            model.objects.filter(pk=target.pk).update(**{
+                field: getattr(target, field) for field in fields
+            })
+        else:
+            # Votes have no delete receivers, so that they're fast
+            # deleted along with their target: saving the target
+            # expires its cached responses instead
+            target.save(update_fields=fields)
+    return target
+
+
+###
+# Serializers
+###
+class VoteSerializer(serializers.Serializer):
+    value = serializers.ChoiceField(choices=Vote.VALUE_CHOICES)
+
+
+###
+# Mixins
+###
+class VoteMixin:
+    """Adds a `vote` route to a viewset of `Votable` objects:
+    `POST` casts (or changes) the user's vote, `DELETE` takes it
+    back. Both answer with the updated counters.
+    """
+    @action(
+        detail=True,
+        methods=['post', 'delete'],
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def vote(self, request, *args, **kwargs):
+        target = self.get_object()
+        value = 0
+        if request.method == 'POST':
+            serializer = VoteSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            value = serializer.validated_data['value']
+
+        target = cast_vote(target, request.user, value)
+        return Response({
+            'vote': value or None,
+            'score': target.score,
+            'upvotes': target.upvotes,
+            'downvotes': target.downvotes,
+        })
+
+
+###
+# Filter backends
+###
+class SortFilter(BaseFilterBackend):
+    """Orders on one of the view's named `sort_orderings`, picked
+    with the `sort` query parameter, keeping only what was created
+    within the window picked with `t` (all time by default).
+
+    Sort orderings must be backed by indexes (see `helpers.checks`)
+    and this backend must come after `OrderingFilter`, whose
+    ordering it replaces.
+    """
+    sort_param = 'sort'
+    window_param = 't'
+    windows = {
+        'day': timedelta(days=1),
+        'week': timedelta(weeks=1),
+        'month': timedelta(days=30),
+        'year': timedelta(days=365),
+        'all': None,
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        orderings = getattr(view, 'sort_orderings', {})
+        ordering = orderings.get(request.query_params.get(self.sort_param))
+        if ordering is None:
+            return queryset
+
+        window = self.windows.get(request.query_params.get(self.window_param))
+        if window is not None:
+            queryset = queryset.filter(created_at__gte=timezone.now() - window)
+        return queryset.order_by(*ordering)
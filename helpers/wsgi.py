@@ -0,0 +1,49 @@
+"""
+WSGI helpers
+"""
+###
+# Libraries
+###
+from django.db import close_old_connections
+
+from .health_check_view import is_ready
+
+
+###
+# Applications
+###
+class HealthCheckApplication:
+    """Answers the load balancer probes before Django's handler,
+    skipping the whole `MIDDLEWARE` stack and URL resolution:
+    `/health-check/` (liveness) right away and `/ready/` from the
+    cached database check. Other requests go to `application`.
+    """
+    health_check_path = '/health-check/'
+    ready_path = '/ready/'
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO')
+        if path == self.health_check_path:
+            return self.respond(start_response, '200 OK', b'Health Check')
+        if path == self.ready_path:
+            # Done by Django's handler around every other request
+            close_old_connections()
+            try:
+                ready = is_ready()
+            finally:
+                close_old_connections()
+            if ready:
+                return self.respond(start_response, '200 OK', b'Ready')
+            return self.respond(start_response, '503 Service Unavailable', b'Not Ready')
+        return self.application(environ, start_response)
+
+    def respond(self, start_response, status, body):
+        start_response(status, [
+            ('Content-Type', 'text/plain'),
+            ('Content-Length', str(len(body))),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
@@ -4,8 +4,10 @@ Posts app's serializers
 ###
 # Libraries
 ###
+from django.conf import settings
 from rest_framework import serializers
 from rest_auth.serializers import UserDetailsSerializer
+from comments.api.serializers import CommentSerializer
 from ..models import Post
 
 
@@ -17,6 +19,11 @@ class PostSerializer(serializers.ModelSerializer):
     author = UserDetailsSerializer(read_only=True)
     topic = serializers.ReadOnlyField(source='topic.title')
 
+    # Used by `NestedViewSetMixin` to filter on the parent topic
+    parent_lookup_kwargs = {
+        'topic_url_name': 'topic__url_name'
+    }
+
     class Meta:
         model = Post
         fields = [
@@ -24,7 +31,40 @@ class PostSerializer(serializers.ModelSerializer):
             'title',
             'topic',
             'content',
+            'comment_count',
+            'score',
+            'upvotes',
+            'downvotes',
             'created_at',
             'updated_at',
             'author'
         ]
+
+
+class PostDetailSerializer(PostSerializer):
+    """Extends `PostSerializer` with a preview of the post's
+    latest comments.
+
+    Listings attach the previews beforehand as `comments_preview`
+    (see `PostViewSet.paginate_queryset`); otherwise they're
+    fetched here, up to the `comments_preview_limit` context key.
+    """
+    comments_preview = serializers.SerializerMethodField()
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['comments_preview']
+
+    def get_comments_preview(self, post):
+        comments = getattr(post, 'comments_preview', None)
+        if comments is None:
+            limit = self.context.get(
+                'comments_preview_limit',
+                settings.POST_COMMENTS_PREVIEW_LIMIT
+            )
+            comments = list(
+                post.comment_set.select_related('author').order_by('-id')[:limit]
+            )
+            for comment in comments:
+                # Saves `CommentSerializer.post` a lookup per comment
+                comment.post = post
+        return CommentSerializer(comments, many=True, context=self.context).data
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from helpers.search import create_search_index, drop_search_index
+
+TABLE = 'posts_post'
+COLUMNS = ['title', 'content']
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, TABLE, COLUMNS)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor, TABLE, COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from helpers.search import keep_search_index
+from helpers.votes import hot_rank
+
+drop_search_index, create_search_index = keep_search_index(
+    'posts_post', ['title', 'content']
+)
+
+
+def set_hot_ranks(apps, schema_editor):
+    # Every existing post has a score of 0
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('created_at').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=2000):
+        post.hot = hot_rank(0, post.created_at)
+        batch.append(post)
+        if len(batch) == 2000:
+            Post.objects.bulk_update(batch, ['hot'])
+            batch = []
+    Post.objects.bulk_update(batch, ['hot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_post_search'),
+    ]
+
+    operations = [
+        drop_search_index,
+        migrations.CreateModel(
+            name='PostVote',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('value', models.SmallIntegerField(choices=[(1, 'upvote'), (-1, 'downvote')], verbose_name='value')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='downvotes'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot',
+            field=models.FloatField(default=0, editable=False, verbose_name='hot'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.IntegerField(default=0, editable=False, verbose_name='score'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='upvotes'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', '-hot', '-id'], name='post_topic_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['topic', '-score', '-id'], name='post_topic_score_idx'),
+        ),
+        migrations.AddField(
+            model_name='postvote',
+            name='post',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='posts.Post', verbose_name='post'),
+        ),
+        migrations.AddField(
+            model_name='postvote',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='user'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='postvote',
+            unique_together={('post', 'user')},
+        ),
+        migrations.RunPython(set_hot_ranks, migrations.RunPython.noop),
+        create_search_index,
+    ]
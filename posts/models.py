@@ -5,8 +5,10 @@ Posts app's models
 # Libraries
 ###
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext as _
-from helpers.models import Publishable
+from helpers.models import Publishable, Votable, Vote
+from helpers.votes import hot_rank
 from topic.models import Topic
 
 
@@ -23,10 +25,11 @@ from topic.models import Topic
 ###
 # Models
 ###
-class Post(Publishable):
+class Post(Publishable, Votable):
     """The model equivalent of a Reddit thread, a `Post`
     belongs to a specific `Topic` and is created by an
-    user (field `Publishable.author`).
+    user (field `Publishable.author`). Users vote on it
+    (`PostVote`, counted by `Votable`).
     """
     content = models.TextField(
         verbose_name=_('content'),
@@ -36,5 +39,79 @@ class Post(Publishable):
     topic = models.ForeignKey(
         to=Topic,
         on_delete=models.CASCADE,
-        verbose_name=_('topic')
+        verbose_name=_('topic'),
+        # Covered by the composite indexes below
+        db_index=False
     )
+
+    # Denormalized counters
+    comment_count = models.PositiveIntegerField(
+        verbose_name=_('comment count'),
+        default=0,
+        editable=False
+    )
+
+    # Ranking (see `helpers.votes.hot_rank`)
+    hot = models.FloatField(
+        verbose_name=_('hot'),
+        default=0,
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            # Backs `PostViewSet`'s default ordering
+            models.Index(
+                fields=['topic', '-id'],
+                name='post_topic_id_idx'
+            ),
+            # Backs the keyset pagination of a topic's posts
+            models.Index(
+                fields=['topic', '-created_at', '-id'],
+                name='post_topic_created_idx'
+            ),
+            # Back the "hot" and "top" sorts of a topic's posts
+            models.Index(
+                fields=['topic', '-hot', '-id'],
+                name='post_topic_hot_idx'
+            ),
+            models.Index(
+                fields=['topic', '-score', '-id'],
+                name='post_topic_score_idx'
+            ),
+            # Backs `PostModelAdmin.ordering`
+            models.Index(
+                fields=['-updated_at'],
+                name='post_updated_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_hot()
+        super().save(*args, **kwargs)
+
+    def set_hot(self):
+        # New posts get their creation time a moment later, which
+        # makes no difference to their rank
+        self.hot = hot_rank(self.score, self.created_at or timezone.now())
+
+    def count_vote(self, old_value, new_value):
+        fields = super().count_vote(old_value, new_value)
+        self.set_hot()
+        return fields + ['hot']
+
+
+class PostVote(Vote):
+    """A user's up or down vote on a `Post`."""
+    post = models.ForeignKey(
+        to=Post,
+        on_delete=models.CASCADE,
+        related_name='votes',
+        verbose_name=_('post'),
+        # Covered by the unique index below
+        db_index=False
+    )
+
+    class Meta:
+        unique_together = [['post', 'user']]
@@ -0,0 +1,115 @@
+"""
+Posts Signals
+"""
+###
+# Libraries
+###
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from helpers.cache import TOPICS_SCOPE, bump_versions, post_scope, topic_scope
+from helpers.counters import collect_deleted, decrement_deleted
+from helpers.votes import discount_votes
+from topic.models import Topic
+from .models import Post, PostVote
+
+User = get_user_model()
+
+
+###
+# Helpers
+###
+def get_topic_url_name(post):
+    """Returns the URL name of `post`'s topic without a query
+    when the topic is already loaded (e.g. by the viewsets).
+    """
+    if Post.topic.is_cached(post):
+        return post.topic.url_name
+    return Topic.objects.filter(
+        pk=post.topic_id
+    ).values_list('url_name', flat=True).first()
+
+
+def get_counters(post):
+    return [(Topic, post.topic_id, 'post_count')]
+
+
+def expire_post_responses(post, *scopes):
+    scopes += (post_scope(post.pk),)
+    url_name = get_topic_url_name(post)
+    if url_name is not None:
+        scopes += (topic_scope(url_name),)
+    bump_versions(*scopes)
+
+
+###
+# Signals
+###
+@receiver(post_save, sender=Post)
+def increment_topic_post_count(sender, instance, created, raw=False, **kwargs):
+    """Counts new posts in `Topic.post_count`, wherever they're
+    created from (viewsets, admin, ORM). Bulk inserts send no
+    signals and count theirs themselves; fixtures come counted.
+    """
+    if created and not raw:
+        Topic.objects.filter(
+            pk=instance.topic_id
+        ).update(post_count=F('post_count') + 1)
+
+
+@receiver(post_save, sender=Post)
+def expire_responses_on_save(sender, instance, created, **kwargs):
+    # New posts also change their topic's `post_count`
+    if created:
+        expire_post_responses(instance, TOPICS_SCOPE)
+    else:
+        expire_post_responses(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_deleted_post(sender, instance, **kwargs):
+    collect_deleted(instance, *get_counters(instance))
+
+
+@receiver(post_delete, sender=Post)
+def decrement_topic_post_count(sender, instance, **kwargs):
+    """Keeps `Topic.post_count` in sync whenever posts go away,
+    including posts removed by cascading deletes, with a single
+    update per remaining topic.
+    """
+    if decrement_deleted(*get_counters(instance)):
+        expire_post_responses(instance, TOPICS_SCOPE)
+    else:
+        # Their topic is expired once, or deleted as well
+        bump_versions(post_scope(instance.pk))
+
+
+@receiver(post_save, sender=PostVote)
+def expire_responses_on_vote(sender, instance, **kwargs):
+    """Votes change the post's counters and rank (see `cast_vote`)."""
+    if PostVote.post.is_cached(instance):
+        expire_post_responses(instance.post)
+
+
+@receiver(pre_delete, sender=User)
+def discount_user_votes(sender, instance, **kwargs):
+    """Takes the votes of a user about to be deleted out of the
+    counters and rank of the posts they're on, all at once. Posts
+    by the user are left out, since they go away as well.
+    """
+    votes = PostVote.objects.filter(user=instance).exclude(post__author=instance)
+    posts = list(discount_votes(Post, votes).select_related('topic').only(
+        'score', 'created_at', 'topic__url_name'
+    ))
+    if not posts:
+        return
+    for post in posts:
+        post.set_hot()
+    Post.objects.bulk_update(posts, ['hot'])
+
+    scopes = set()
+    for post in posts:
+        scopes.update((post_scope(post.pk), topic_scope(post.topic.url_name)))
+    bump_versions(*scopes)
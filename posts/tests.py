@@ -4,13 +4,20 @@ Posts testing
 ###
 # Libraries
 ###
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
+from comments.models import Comment
 from topic.models import Topic
-from .models import Post
+from .models import Post, PostVote
 
 
 User = get_user_model()
@@ -356,3 +363,566 @@ class PostDeletionTestCase(APITestCase):
             id=self.post1.id,
         )
         self.assertTrue(deleted_post.exists())
+
+
+class PostKeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+
+        # More posts than fit in a single page
+        for i in range(25):
+            Post.objects.create(
+                author=self.user1,
+                title='Post {0}'.format(i),
+                content='Rich content {0}'.format(i),
+                topic=self.topic1
+            )
+        self.url = reverse('post-list', args=[self.topic1.url_name])
+
+    def test_list_posts_with_cursor(self):
+        """Tests that walking the cursors returns every post
+        exactly once, newest first.
+        """
+        response = self.client.get(self.url, {'paginate': 'cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        ids = [post['id'] for post in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['next'])
+        ids += [post['id'] for post in response.data['results']]
+        expected_ids = list(Post.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected_ids)
+
+    def test_cursor_follows_the_ordering(self):
+        """Tests that cursors seek on the listing's own ordering,
+        ids not always following creation times (e.g. imported posts).
+        """
+        first = Post.objects.order_by('id').first()
+        Post.objects.filter(pk=first.pk).update(created_at=timezone.now() + timedelta(days=1))
+
+        for ordering in ('-id', '-created_at,-id'):
+            response = self.client.get(self.url, {'ordering': ordering, 'paginate': 'cursor'})
+            ids = [post['id'] for post in response.data['results']]
+            response = self.client.get(response.data['next'])
+            ids += [post['id'] for post in response.data['results']]
+
+            expected_ids = list(Post.objects.order_by(
+                *ordering.split(',')
+            ).values_list('id', flat=True))
+            self.assertEqual(ids, expected_ids)
+        self.assertEqual(ids[0], first.pk)
+
+    def test_previous_cursor(self):
+        """Tests that the previous cursor of the second page
+        leads back to the first one.
+        """
+        first_page = self.client.get(self.url, {'paginate': 'cursor'})
+        second_page = self.client.get(first_page.data['next'])
+        response = self.client.get(second_page.data['previous'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], first_page.data['results'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        """Tests that a tampered cursor is rejected."""
+        response = self.client.get(
+            self.url,
+            {'paginate': 'cursor', 'cursor': 'cD1ub3QtYS1kYXRl'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_other_orderings(self):
+        """Tests that cursors, always newest first, are refused
+        along with sorts, orderings or searches they'd discard.
+        """
+        response = self.client.get(self.url, {'sort': 'new', 'paginate': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for params in ({'sort': 'top'}, {'ordering': 'id'}, {'search': 'content'}):
+            response = self.client.get(self.url, dict(params, paginate='cursor'))
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('paginate', response.data)
+
+
+class PostQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=self.password_example
+        )
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.create_posts(2)
+
+    def create_posts(self, amount):
+        """Creates `amount` posts, each by a different author."""
+        offset = Post.objects.count()
+        for i in range(offset, offset + amount):
+            author = User.objects.create(
+                username='author{0}'.format(i),
+                password=self.password_example
+            )
+            Post.objects.create(
+                author=author,
+                title='Post {0}'.format(i),
+                content='Rich content {0}'.format(i),
+                topic=self.topic1
+            )
+
+    def test_list_posts_query_count(self):
+        """Tests that the number of queries needed to list
+        a topic's posts doesn't grow with the size of the page.
+        """
+        url = reverse('post-list', args=[self.topic1.url_name])
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url)
+
+        self.create_posts(10)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(url)
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(large_page), len(small_page))
+
+
+class PostCounterTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+
+    def test_post_creation_increments_counter(self):
+        """Tests that creating a post bumps its topic's
+        `post_count`.
+        """
+        url = reverse('post-list', args=[self.topic1.url_name])
+        payload = {
+            'title': 'Creating a post',
+            'content': 'Rich content',
+        }
+        self.client.post(url, payload)
+        self.client.post(url, payload)
+
+        self.topic1.refresh_from_db()
+        self.assertEqual(self.topic1.post_count, 2)
+        response = self.client.get(
+            reverse('topic-detail', args=[self.topic1.url_name])
+        )
+        self.assertEqual(response.data['post_count'], 2)
+
+    def test_post_deletion_decrements_counter(self):
+        """Tests that deleting a post, directly or through
+        its author, decrements its topic's `post_count`.
+        """
+        url = reverse('post-list', args=[self.topic1.url_name])
+        payload = {
+            'title': 'Creating a post',
+            'content': 'Rich content',
+        }
+        response = self.client.post(url, payload)
+        self.client.post(url, payload)
+        self.client.delete(
+            reverse('post-detail', args=[self.topic1.url_name, response.data['id']])
+        )
+
+        self.topic1.refresh_from_db()
+        self.assertEqual(self.topic1.post_count, 1)
+
+        # Posts created and deleted outside of the viewsets
+        # (e.g. cascading deletes) are counted all the same
+        user2 = User.objects.create(username='user2')
+        Post.objects.create(
+            author=user2,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        user2.delete()
+
+        self.topic1.refresh_from_db()
+        self.assertEqual(self.topic1.post_count, 1)
+
+
+class PostCommentsPreviewTestCase(APITestCase):
+    def setUp(self):
+        self.password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=self.password_example
+        )
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        for i in range(5):
+            Comment.objects.create(
+                title='Comment {0}'.format(i),
+                author=self.user1,
+                content='A smart addendum {0}'.format(i),
+                post=self.post1
+            )
+
+    def create_posts_with_comments(self, amount):
+        """Creates `amount` posts, each by a different author
+        and with two comments.
+        """
+        offset = Post.objects.count()
+        for i in range(offset, offset + amount):
+            author = User.objects.create(
+                username='author{0}'.format(i),
+                password=self.password_example
+            )
+            post = Post.objects.create(
+                author=author,
+                title='Post {0}'.format(i + 1),
+                content='Rich content {0}'.format(i),
+                topic=self.topic1
+            )
+            for j in range(2):
+                Comment.objects.create(
+                    title='Comment {0}'.format(j),
+                    author=author,
+                    content='A smart addendum {0}'.format(j),
+                    post=post
+                )
+
+    def test_post_details_preview_comments(self):
+        """Tests that a post's details carry its latest
+        comments, newest first.
+        """
+        url = reverse('post-detail', args=[self.topic1.url_name, self.post1.id])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [comment['title'] for comment in response.data['comments_preview']]
+        self.assertEqual(titles, ['Comment 4', 'Comment 3', 'Comment 2'])
+
+        response = self.client.get(url, {'comments_preview': 0})
+        self.assertNotIn('comments_preview', response.data)
+
+    def test_list_posts_preview_comments(self):
+        """Tests that listings only preview comments on request,
+        and then do it per post.
+        """
+        self.create_posts_with_comments(1)
+        url = reverse('post-list', args=[self.topic1.url_name])
+
+        response = self.client.get(url)
+        self.assertNotIn('comments_preview', response.data['results'][0])
+
+        response = self.client.get(url, {'comments_preview': 4})
+        previews = {
+            post['title']: [comment['title'] for comment in post['comments_preview']]
+            for post in response.data['results']
+        }
+        self.assertEqual(previews, {
+            'Post 1': ['Comment 4', 'Comment 3', 'Comment 2', 'Comment 1'],
+            'Post 2': ['Comment 1', 'Comment 0'],
+        })
+
+    def test_list_posts_preview_query_count(self):
+        """Tests that previewing comments on a listing doesn't
+        take one query per post.
+        """
+        url = reverse('post-list', args=[self.topic1.url_name])
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url, {'comments_preview': 2})
+
+        self.create_posts_with_comments(10)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(url, {'comments_preview': 2})
+
+        self.assertEqual(response.data['count'], 11)
+        self.assertEqual(len(large_page), len(small_page))
+
+
+class PostBulkCreationTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+        Token.objects.create(user=self.user1)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.url = reverse('post-bulk', args=[self.topic1.url_name])
+
+    def test_bulk_creation_success(self):
+        """Tests that every post is created and counted
+        on the topic.
+        """
+        self.client.credentials(
+            HTTP_AUTHORIZATION='Token ' + self.user1.auth_token.key
+        )
+        payload = [
+            {'title': 'Post {0}'.format(i), 'content': 'Rich content'}
+            for i in range(3)
+        ]
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Post.objects.filter(topic=self.topic1, author=self.user1).count(), 3
+        )
+        self.topic1.refresh_from_db()
+        self.assertEqual(self.topic1.post_count, 3)
+
+    def test_bulk_creation_unauthenticated(self):
+        payload = [{'title': 'Post 1', 'content': 'Rich content'}]
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Post.objects.exists())
+
+
+class PostSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Gardening',
+            content='Tomatoes need sun',
+            topic=self.topic1
+        )
+        self.post2 = Post.objects.create(
+            author=self.user1,
+            title='Tomatoes',
+            content='Tomatoes, tomatoes and more tomatoes',
+            topic=self.topic1
+        )
+        self.post3 = Post.objects.create(
+            author=self.user1,
+            title='Cooking',
+            content='Pasta recipes',
+            topic=self.topic1
+        )
+        self.url = reverse('post-list', args=[self.topic1.url_name])
+
+    def test_search_ranks_by_relevance(self):
+        response = self.client.get(self.url, {'search': 'tomatoes'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post2.id, self.post1.id]
+        )
+
+    def test_search_sees_updates(self):
+        """Tests that the index follows `update`s as well,
+        which don't go through `save`.
+        """
+        Post.objects.filter(pk=self.post3.pk).update(content='Tomato sauce')
+
+        response = self.client.get(self.url, {'search': 'sauce'})
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post3.id]
+        )
+
+    def test_search_takes_operators_literally(self):
+        response = self.client.get(self.url, {'search': '"pasta (*'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post3.id]
+        )
+
+
+class PostVoteTestCase(APITestCase):
+    def setUp(self):
+        password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=password_example
+        )
+        Token.objects.create(user=self.user1)
+        self.user2 = User.objects.create(
+            username='user2',
+            password=password_example
+        )
+        Token.objects.create(user=self.user2)
+
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.post2 = Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic1
+        )
+        self.list_url = reverse('post-list', args=[self.topic1.url_name])
+
+    def vote(self, user, post, value=None):
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + user.auth_token.key)
+        url = reverse('post-vote', args=[self.topic1.url_name, post.id])
+        if value is None:
+            return self.client.delete(url)
+        return self.client.post(url, {'value': value})
+
+    def test_votes_update_counters(self):
+        """Tests that casting, changing and taking back votes
+        keeps the post's counters and rank in sync.
+        """
+        self.vote(self.user1, self.post1, 1)
+        response = self.vote(self.user2, self.post1, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['score'], 2)
+
+        response = self.vote(self.user2, self.post1, -1)
+        self.assertEqual(
+            (response.data['upvotes'], response.data['downvotes'], response.data['score']),
+            (1, 1, 0)
+        )
+
+        response = self.vote(self.user1, self.post1)
+        self.assertEqual(response.data['score'], -1)
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.score, -1)
+        self.assertEqual(self.post1.votes.count(), 1)
+
+    def test_cascade_deletion_updates_counters(self):
+        """Tests that votes deleted along with their user are
+        taken out of the post's counters and rank.
+        """
+        self.vote(self.user1, self.post1, 1)
+        self.vote(self.user2, self.post1, 1)
+        self.post1.refresh_from_db()
+        hot = self.post1.hot
+
+        self.user2.delete()
+
+        self.post1.refresh_from_db()
+        self.assertEqual(
+            (self.post1.upvotes, self.post1.downvotes, self.post1.score),
+            (1, 0, 1)
+        )
+        self.assertLess(self.post1.hot, hot)
+        self.client.credentials()
+        response = self.client.get(self.list_url, {'sort': 'top'})
+        self.assertEqual(response.data['results'][0]['score'], 1)
+
+    def test_cascade_deletion_discounts_all_posts(self):
+        """Tests that the votes of a deleted user are taken out of
+        every post they're on, and that votes are fast deleted.
+        """
+        self.vote(self.user2, self.post1, 1)
+        self.vote(self.user2, self.post2, -1)
+
+        self.user2.delete()
+
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('upvotes', 'downvotes', 'score')),
+            [(0, 0, 0), (0, 0, 0)]
+        )
+        self.assertFalse(pre_delete.has_listeners(PostVote))
+        self.assertFalse(post_delete.has_listeners(PostVote))
+
+    def test_vote_by_non_author(self):
+        """Tests that anyone authenticated can vote, not only
+        the post's author.
+        """
+        response = self.vote(self.user2, self.post1, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.vote(self.user2, self.post1, 2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sort_modes(self):
+        self.vote(self.user1, self.post1, 1)
+        self.vote(self.user2, self.post1, 1)
+
+        for sort, expected in (
+            ('top', [self.post1.id, self.post2.id]),
+            ('hot', [self.post1.id, self.post2.id]),
+            ('new', [self.post2.id, self.post1.id]),
+        ):
+            response = self.client.get(self.list_url, {'sort': sort})
+            self.assertEqual(
+                [post['id'] for post in response.data['results']],
+                expected
+            )
+
+    def test_top_window(self):
+        """Tests that `t` leaves older posts out."""
+        Post.objects.filter(pk=self.post1.pk).update(
+            created_at=self.post1.created_at - timedelta(days=2)
+        )
+
+        response = self.client.get(self.list_url, {'sort': 'top', 't': 'day'})
+
+        self.assertEqual(
+            [post['id'] for post in response.data['results']],
+            [self.post2.id]
+        )
@@ -4,29 +4,125 @@ Posts app's views
 ###
 # Libraries
 ###
+from django.conf import settings
+from django.db.models import F
+from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ModelViewSet
-from posts.api.serializers import PostSerializer
+from posts.api.serializers import PostSerializer, PostDetailSerializer
 from rest_framework.filters import OrderingFilter
+from rest_framework_nested.viewsets import NestedViewSetMixin
+from helpers.bulk import BulkCreateMixin, bulk_insert
+from helpers.cache import (
+    TOPICS_SCOPE,
+    CachedResponseMixin,
+    bump_versions,
+    post_scope,
+    topic_scope,
+)
+from helpers.conditional import ConditionalGetMixin
+from helpers.pagination import PageNumberOrKeysetPagination
+from helpers.search import FullTextSearchFilter
+from helpers.votes import SortFilter, VoteMixin
 from helpers.permissions import ObjectPermissionIsAuthenticatedOrReadOnly
+from helpers.replica import ReplicaReadMixin
+from comments.models import Comment
 from topic.models import Topic
 
 
 ###
 # Viewsets
 ###
-class PostViewSet(ModelViewSet):
-    """A basic viewset for the `Post` model."""
+class PostViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                  BulkCreateMixin, VoteMixin, NestedViewSetMixin, ModelViewSet):
+    """A basic viewset for the `Post` model, nested
+    under a `Topic` (see `PostSerializer.parent_lookup_kwargs`).
+    """
     serializer_class = PostSerializer
-    model = PostSerializer.Meta.model    
-    filter_backends = [OrderingFilter]
+    model = PostSerializer.Meta.model
+    queryset = model.objects.select_related('author', 'topic')
+    filter_backends = [OrderingFilter, SortFilter, FullTextSearchFilter]
     ordering = '-id'
+    ordering_fields = ['id', 'created_at']
+    sort_orderings = {
+        'hot': ('-hot', '-id'),
+        'top': ('-score', '-id'),
+        'new': ('-id',),
+    }
+    search_fields = ['title', 'content']
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [ObjectPermissionIsAuthenticatedOrReadOnly]
 
-    def get_queryset(self):
-        return self.model.objects.filter(
-            topic__url_name=self.kwargs['topic_url_name']
-        )
+    def get_cache_scopes(self):
+        scopes = [topic_scope(self.kwargs['topic_url_name'])]
+        if self.action == 'retrieve':
+            scopes.append(post_scope(self.kwargs['pk']))
+        return scopes
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve') and self.get_comments_preview_limit():
+            return PostDetailSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['comments_preview_limit'] = self.get_comments_preview_limit()
+        return context
+
+    def get_comments_preview_limit(self):
+        """Reads the number of previewed comments from the
+        `comments_preview` query parameter, capped at
+        `POST_COMMENTS_PREVIEW_MAX_LIMIT`. Post details preview
+        `POST_COMMENTS_PREVIEW_LIMIT` comments by default, while
+        listings only do so on request.
+        """
+        default = 0
+        if self.action == 'retrieve':
+            default = settings.POST_COMMENTS_PREVIEW_LIMIT
+        try:
+            limit = int(self.request.query_params['comments_preview'])
+        except (KeyError, ValueError):
+            return default
+        return max(0, min(limit, settings.POST_COMMENTS_PREVIEW_MAX_LIMIT))
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        limit = self.get_comments_preview_limit()
+        if page is not None and limit:
+            self.attach_comments_preview(page, limit)
+        return page
+
+    def attach_comments_preview(self, posts, limit):
+        """Loads the previews of a whole page of posts at once,
+        rather than one comments query per post.
+        """
+        posts_by_pk = {post.pk: post for post in posts}
+        for post in posts:
+            post.comments_preview = []
+        for comment in Comment.objects.latest_per_post(list(posts_by_pk), limit):
+            comment.post = posts_by_pk[comment.post_id]
+            comment.post.comments_preview.append(comment)
 
     def perform_create(self, serializer):
         topic = Topic.objects.get(url_name=self.kwargs['topic_url_name'])
         serializer.save(author=self.request.user, topic=topic)
+
+    def get_bulk_parent(self):
+        return get_object_or_404(Topic, url_name=self.kwargs['topic_url_name'])
+
+    def perform_bulk_create(self, posts, topic):
+        for post in posts:
+            post.author = self.request.user
+            post.topic = topic
+            post.set_hot()
+        bulk_insert(
+            self.model,
+            posts,
+            settings.BULK_CREATE_BATCH_SIZE,
+            author=self.request.user,
+            topic=topic
+        )
+        Topic.objects.filter(pk=topic.pk).update(
+            post_count=F('post_count') + len(posts)
+        )
+        # `bulk_create` skips the signals that usually do this
+        bump_versions(TOPICS_SCOPE, topic_scope(topic.url_name))
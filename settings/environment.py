@@ -0,0 +1,110 @@
+"""
+backend-challenge-001 environment loading
+
+Deployments keep their environment variables in S3. Rather than
+fetching them whenever settings are imported (every worker, every
+`manage.py` call), they're resolved once at deploy time into a local
+cache file, along with the host's private IP:
+
+    python -m settings.environment
+"""
+###
+# Libraries
+###
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_BUCKET = 'bucket-env'
+ENV_CACHE_FILE = os.environ.get('ENV_CACHE_FILE', os.path.join(BASE_DIR, '.env-cache.json'))
+EC2_METADATA_URL = 'http://169.254.169.254/latest/meta-data/local-ipv4'
+
+
+###
+# Helpers
+###
+def get_env_file(environment):
+    return 'envs-production.json' if environment == 'production' else 'envs-staging.json'
+
+
+def get_ec2_private_ip(timeout=0.01):
+    """Asks the EC2 metadata endpoint for the host's private IP,
+    returning None outside of EC2.
+    """
+    # Imported on use, like boto3 below, to keep them out of startup
+    import requests
+
+    try:
+        return requests.get(EC2_METADATA_URL, timeout=timeout).text
+    except requests.exceptions.RequestException:
+        return None
+
+
+def get_s3_variables(key):
+    """Reads the variables of the S3 env file `key`, leaving
+    `os.environ` alone (unlike `S3Environ`).
+    """
+    import boto3
+
+    body = boto3.resource('s3').Object(bucket_name=ENV_BUCKET, key=key).get()['Body'].read()
+    return json.loads(body.decode('utf-8'))
+
+
+def write_environment_cache(environment, path=ENV_CACHE_FILE):
+    """Resolves the environment variables and private IP of a
+    deployment and stores them at `path`, readable by its owner only.
+    """
+    variables = get_s3_variables(get_env_file(environment))
+    ec2_private_ip = get_ec2_private_ip(timeout=1)
+    if ec2_private_ip:
+        variables['EC2_PRIVATE_IP'] = ec2_private_ip
+
+    temporary_path = '{0}.tmp'.format(path)
+    descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, 'w') as cache_file:
+        json.dump(variables, cache_file)
+    os.replace(temporary_path, path)
+
+
+def load_environment(environment, path=ENV_CACHE_FILE):
+    """Sets the environment variables of a deployment from the cache
+    file, falling back to S3 when it wasn't written.
+    """
+    if os.path.exists(path):
+        with open(path) as cache_file:
+            variables = json.load(cache_file)
+        for key, value in variables.items():
+            os.environ[key] = str(value)
+        return
+
+    from s3_environ import S3Environ
+
+    env_file = get_env_file(environment)
+    S3Environ(bucket=ENV_BUCKET, key=env_file)
+    print("Loading envs from S3: {0}".format(env_file))
+
+
+class AllowedHosts(list):
+    """`ALLOWED_HOSTS` that looks the host's private IP up the first
+    time a request's host matches none of the other entries, rather
+    than when settings are imported.
+    """
+    def __init__(self, hosts, discover=get_ec2_private_ip):
+        super().__init__(hosts)
+        self.discover = discover
+        self.discovered = False
+
+    def __iter__(self):
+        yield from super().__iter__()
+        if not self.discovered:
+            self.discovered = True
+            host = self.discover()
+            if host:
+                self.append(host)
+                yield host
+
+
+if __name__ == '__main__':
+    write_environment_cache(os.environ.get('ENVIRONMENT'))
+    sys.stdout.write('Wrote the environment cache to {0}\n'.format(ENV_CACHE_FILE))
@@ -5,14 +5,11 @@ backend-challenge-001 settings
 # Libraries
 ###
 import os
-import requests
 
 import dj_database_url
 import dotenv
-import sentry_sdk
 
-from s3_environ import S3Environ
-from sentry_sdk.integrations.django import DjangoIntegration
+from .environment import AllowedHosts, load_environment
 
 ###
 # Get data from .env file
@@ -22,10 +19,9 @@ dotenv.read_dotenv(os.path.join(BASE_DIR, '.env'))
 ENVIRONMENT = os.environ.get('ENVIRONMENT')
 LOAD_ENVS_FROM_FILE = True if os.environ.get('LOAD_ENVS_FROM_FILE', False) == 'True' else False
 
-env_file = 'envs-production.json' if ENVIRONMENT == 'production' else 'envs-staging.json'
+# Read from the cache written at deploy time (see `settings.environment`)
 if not LOAD_ENVS_FROM_FILE:
-    S3Environ(bucket='bucket-env', key=env_file)
-    print("Loading envs from S3: {0}".format(env_file))
+    load_environment(ENVIRONMENT)
 
 ###
 # Security
@@ -39,17 +35,13 @@ ALLOWED_HOSTS = [
     'localhost',
 ]
 
-EC2_PRIVATE_IP = None
-try:
-    EC2_PRIVATE_IP = requests.get(
-        'http://169.254.169.254/latest/meta-data/local-ipv4',
-        timeout=0.01,
-    ).text
-except requests.exceptions.RequestException:
-    pass
-
+# Resolved at deploy time, or else looked up by the first request
+# whose host isn't any of the above
+EC2_PRIVATE_IP = os.environ.get('EC2_PRIVATE_IP')
 if EC2_PRIVATE_IP:
     ALLOWED_HOSTS.append(EC2_PRIVATE_IP)
+elif not LOAD_ENVS_FROM_FILE:
+    ALLOWED_HOSTS = AllowedHosts(ALLOWED_HOSTS)
 
 ###
 # Application definition
@@ -91,12 +83,14 @@ INSTALLED_APPS = [
     'accounts',
     'comments',
     'posts',
-    'topic'
+    'topic',
+    'helpers',
 ]
 
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'helpers.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -136,6 +130,55 @@ DATABASE_URL = os.environ.get('DATABASE_URL')
 DATABASES = {'default': dj_database_url.parse(DATABASE_URL)}
 DATABASES['default']['ATOMIC_REQUESTS'] = True
 
+# Safe requests of the topic, post and comment routes read from the
+# replica, when there's one (see `helpers.replica`)
+DATABASE_READ_REPLICA_URL = os.environ.get('DATABASE_READ_REPLICA_URL')
+DATABASE_READ_REPLICA = 'replica' if DATABASE_READ_REPLICA_URL else None
+if DATABASE_READ_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_READ_REPLICA_URL)
+elif ENVIRONMENT == 'test':
+    # Stand-in for tests, which turn routing on themselves
+    DATABASES['replica'] = dj_database_url.parse('sqlite://')
+DATABASE_ROUTERS = ['helpers.replica.ReplicaRouter']
+# Seconds the replica may lag behind, during which users
+# who just wrote something keep reading from the primary
+DATABASE_READ_REPLICA_LAG = 5
+# Cache remembering those users, whichever worker they hit next
+DATABASE_READ_REPLICA_PIN_CACHE_ALIAS = 'default'
+
+###
+# Cache
+###
+# Every worker process must see the same cache: versions bumped by
+# one of them expire the responses cached by the others. Locmem is
+# per process, so it's only the default where a single process
+# serves requests; deployments default to files all workers share
+# (`helpers.checks.check_shared_caches` refuses locmem there)
+LOCAL_MEMORY_CACHE_SHARED = DEBUG or ENVIRONMENT == 'test'
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache' if LOCAL_MEMORY_CACHE_SHARED
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            '' if LOCAL_MEMORY_CACHE_SHARED else '/tmp/django-cache'
+        ),
+    }
+}
+
+# Topic, post and comment responses (see `helpers.cache`)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_CACHE_STALE_TIMEOUT = 30
+RESPONSE_CACHE_LOCK_TIMEOUT = 5
+
+# Authentication tokens (see `accounts.authentication`)
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
 ###
 # Internationalization
 ###
@@ -180,12 +223,45 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+###
+# Topics
+###
+# Posts embedded in a topic's details (`?recent_posts=` overrides it)
+TOPIC_RECENT_POSTS_LIMIT = 5
+TOPIC_RECENT_POSTS_MAX_LIMIT = 20
+
+# Rows read per round trip (and lines written per chunk) by exports
+EXPORT_CHUNK_SIZE = 2000
+
+###
+# Posts
+###
+# Comments previewed on a post (`?comments_preview=` overrides it)
+POST_COMMENTS_PREVIEW_LIMIT = 3
+POST_COMMENTS_PREVIEW_MAX_LIMIT = 10
+
+###
+# Comments
+###
+# Levels read by the thread routes (`?depth=` overrides it), replies
+# shown per branch and comments read per response
+COMMENT_THREAD_DEPTH = 5
+COMMENT_THREAD_REPLIES_LIMIT = 20
+COMMENT_THREAD_MAX_SIZE = 5000
+
+###
+# Bulk creation
+###
+# Items accepted by the `bulk` routes and rows per `INSERT`
+BULK_CREATE_MAX_ITEMS = 5000
+BULK_CREATE_BATCH_SIZE = 500
+
 ###
 # Authentication
 ###
@@ -246,20 +322,57 @@ SOCIALACCOUNT_PROVIDERS = {
     },
 }
 
+# Calls to the providers above (see `accounts.http_client`): seconds
+# to connect and read, retries, connections kept per host, failures
+# in a row that stop calls for a while (in seconds) and seconds a
+# profile is remembered per token
+SOCIAL_HTTP_CONNECT_TIMEOUT = 3.05
+SOCIAL_HTTP_READ_TIMEOUT = 5
+SOCIAL_HTTP_RETRIES = 2
+SOCIAL_HTTP_POOL_SIZE = 10
+SOCIAL_HTTP_BREAKER_THRESHOLD = 5
+SOCIAL_HTTP_BREAKER_RESET_TIMEOUT = 30
+SOCIAL_PROFILE_CACHE_ALIAS = 'default'
+SOCIAL_PROFILE_CACHE_TIMEOUT = 60
+
 ###
 # Change Password
 ###
 OLD_PASSWORD_FIELD_ENABLED = True
 
+###
+# Change Email
+###
+# Seconds a change email confirmation link stays valid, expired
+# requests being deleted by `purge_change_email_requests`
+CHANGE_EMAIL_REQUEST_TIMEOUT = int(os.environ.get('CHANGE_EMAIL_REQUEST_TIMEOUT', 60 * 60 * 24))
+
 ###
 # CORS
 ###
 CORS_ORIGIN_ALLOW_ALL = True
 
+###
+# Health Checks
+###
+# Seconds the database check of `/ready/` is remembered for
+READINESS_CACHE_TIMEOUT = 5
+
+###
+# Metrics
+###
+# Bearer token expected by `/metrics/` (only open in debug mode when unset)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 ###
 # Sentry & Logging
 ###
-if not DEBUG and ENVIRONMENT != 'test':
+# Sentry is only imported when enabled
+SENTRY_ENABLED = not DEBUG and ENVIRONMENT != 'test'
+if SENTRY_ENABLED:
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+
     def before_send(event, hint):
         # Ignore disallowed hosts
         if event.get('logger') == 'django.security.DisallowedHost':
@@ -289,7 +402,10 @@ LOGGING = {
     'handlers': {
         'sentry': {
             'level': 'ERROR',
-            'class': 'sentry_sdk.integrations.logging.EventHandler',
+            'class': (
+                'sentry_sdk.integrations.logging.EventHandler'
+                if SENTRY_ENABLED else 'logging.NullHandler'
+            ),
         },
         'console': {
             'level': 'DEBUG',
@@ -343,3 +459,9 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 if not DEBUG and ENVIRONMENT != 'test':
     EMAIL_BACKEND = 'django_amazon_ses.EmailBackend'
     AWS_DEFAULT_REGION = 'us-west-2'
+
+# Emails are queued in the outbox and sent by `send_outbox_emails`,
+# which retries failures up to `OUTBOX_MAX_ATTEMPTS` times, waiting
+# `OUTBOX_RETRY_DELAY` seconds, doubled after each attempt
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_DELAY = int(os.environ.get('OUTBOX_RETRY_DELAY', 60))
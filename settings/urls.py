@@ -6,7 +6,8 @@ backend-challenge-001 URL Configuration
 ###
 from django.conf.urls import url, include
 from django.contrib import admin
-from helpers.health_check_view import health_check
+from helpers.health_check_view import health_check, ready
+from helpers.metrics import metrics
 from .routers import (
     main_router,
     posts_router,
@@ -22,6 +23,10 @@ urlpatterns = [
 
     # Health Check
     url(r'health-check/$', health_check, name='health_check'),
+    url(r'^ready/$', ready, name='ready'),
+
+    # Metrics
+    url(r'^metrics/$', metrics, name='metrics'),
 
     # Applications
     url(r'^', include('accounts.urls')),
@@ -7,9 +7,11 @@ backend-challenge-001 WSGI Configuration
 import os
 
 from django.core.wsgi import get_wsgi_application
+from helpers.wsgi import HealthCheckApplication
 
 ###
 # Main Configuration
 ###
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.settings")
-application = get_wsgi_application()
+# Probes are answered before Django's handler
+application = HealthCheckApplication(get_wsgi_application())
@@ -4,8 +4,10 @@ Topic app's serializers
 ###
 # Libraries
 ###
+from django.conf import settings
 from rest_framework import serializers
 from rest_auth.serializers import UserDetailsSerializer
+from posts.api.serializers import PostSerializer
 from ..models import Topic
 
 
@@ -24,6 +26,35 @@ class TopicSerializer(serializers.ModelSerializer):
             'author',
             'description',
             'url_name',
+            'post_count',
             'created_at',
             'updated_at'
         ]
+
+
+class TopicDetailSerializer(TopicSerializer):
+    """Extends `TopicSerializer` with the topic's latest posts.
+
+    The number of posts is read from the `recent_posts_limit`
+    context key (see `TopicViewSet.get_serializer_context`).
+    """
+    recent_posts = serializers.SerializerMethodField()
+
+    class Meta(TopicSerializer.Meta):
+        fields = TopicSerializer.Meta.fields + ['recent_posts']
+
+    def get_recent_posts(self, topic):
+        limit = self.context.get(
+            'recent_posts_limit',
+            settings.TOPIC_RECENT_POSTS_LIMIT
+        )
+        if not limit:
+            return []
+
+        posts = list(
+            topic.post_set.select_related('author').order_by('-id')[:limit]
+        )
+        for post in posts:
+            # Saves `PostSerializer.topic` a lookup per post
+            post.topic = topic
+        return PostSerializer(posts, many=True, context=self.context).data
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TopicConfig(AppConfig):
     name = 'topic'
+
+    def ready(self):
+        import topic.signals
@@ -0,0 +1,34 @@
+# Generated by Django 3.0.7 on 2026-10-18 09:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Topic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('title', models.CharField(max_length=80, verbose_name='title')),
+                ('description', models.CharField(max_length=140, verbose_name='description')),
+                ('url_name', models.SlugField(max_length=30, unique=True, verbose_name='URL name')),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='post count')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='author')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['-updated_at'], name='topic_updated_idx'),
+        ),
+    ]
@@ -34,3 +34,27 @@ class Topic(Publishable):
         max_length=30,
         unique=True
     )
+
+    # Denormalized counters
+    post_count = models.PositiveIntegerField(
+        verbose_name=_('post count'),
+        default=0,
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            # Backs `TopicModelAdmin.ordering`
+            models.Index(
+                fields=['-updated_at'],
+                name='topic_updated_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that renaming a topic also expires
+        # the responses cached under its previous URL
+        instance.loaded_url_name = instance.__dict__.get('url_name')
+        return instance
@@ -0,0 +1,34 @@
+"""
+Topic Signals
+"""
+###
+# Libraries
+###
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from helpers.cache import TOPICS_SCOPE, bump_versions, topic_scope
+from helpers.counters import collect_deleted
+from .models import Topic
+
+
+###
+# Signals
+###
+@receiver(pre_delete, sender=Topic)
+def collect_deleted_topic(sender, instance, **kwargs):
+    # So that posts deleted along with it don't update it
+    collect_deleted(instance)
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+def expire_topic_responses(sender, instance, **kwargs):
+    """Expires the cached topic listing and the topic's own
+    responses, under its current and previous URL names.
+    """
+    scopes = [TOPICS_SCOPE, topic_scope(instance.url_name)]
+    loaded_url_name = getattr(instance, 'loaded_url_name', None)
+    if loaded_url_name and loaded_url_name != instance.url_name:
+        scopes.append(topic_scope(loaded_url_name))
+    bump_versions(*scopes)
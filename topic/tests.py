@@ -4,12 +4,20 @@ Topic testing
 ###
 # Libraries
 ###
+import gzip
+import json
+
 from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
+from comments.models import Comment
+from posts.models import Post
 from .models import Topic
+from .views import TopicViewSet
 
 
 User = get_user_model()
@@ -256,3 +264,204 @@ class TopicDeletionTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         topic_qs = Topic.objects.filter(id=self.topic1.id)
         self.assertTrue(topic_qs.exists())
+
+
+class TopicQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.password_example = 'userrules'
+        self.create_topics(2)
+
+    def create_topics(self, amount):
+        """Creates `amount` topics, each by a different author."""
+        offset = Topic.objects.count()
+        for i in range(offset, offset + amount):
+            author = User.objects.create(
+                username='user{0}'.format(i),
+                password=self.password_example
+            )
+            Topic.objects.create(
+                title='Title {0}'.format(i),
+                author=author,
+                description='Description',
+                url_name='title{0}'.format(i)
+            )
+
+    def test_list_topics_query_count(self):
+        """Tests that the number of queries needed to list
+        topics doesn't grow with the size of the page.
+        """
+        url = reverse('topic-list')
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url)
+
+        self.create_topics(10)
+        with CaptureQueriesContext(connection) as large_page:
+            response = self.client.get(url)
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(large_page), len(small_page))
+
+
+class TopicRecentPostsTestCase(APITestCase):
+    def setUp(self):
+        self.password_example = 'userrules'
+        self.user1 = User.objects.create(
+            username='user1',
+            password=self.password_example
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.url = reverse('topic-detail', args=[self.topic1.url_name])
+        self.create_posts(3)
+
+    def create_posts(self, amount):
+        """Creates `amount` posts, each by a different author."""
+        offset = Post.objects.count()
+        for i in range(offset, offset + amount):
+            author = User.objects.create(
+                username='author{0}'.format(i),
+                password=self.password_example
+            )
+            Post.objects.create(
+                author=author,
+                title='Post {0}'.format(i),
+                content='Rich content {0}'.format(i),
+                topic=self.topic1
+            )
+
+    def test_topic_details_embed_recent_posts(self):
+        """Tests that a topic's details carry its latest posts,
+        newest first.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [post['title'] for post in response.data['recent_posts']]
+        self.assertEqual(titles, ['Post 2', 'Post 1', 'Post 0'])
+
+    def test_recent_posts_limit(self):
+        """Tests that `?recent_posts=` bounds the embedded posts
+        and is capped by `TOPIC_RECENT_POSTS_MAX_LIMIT`.
+        """
+        response = self.client.get(self.url, {'recent_posts': 1})
+        self.assertEqual(len(response.data['recent_posts']), 1)
+
+        response = self.client.get(self.url, {'recent_posts': 0})
+        self.assertEqual(response.data['recent_posts'], [])
+
+        self.create_posts(30)
+        response = self.client.get(self.url, {'recent_posts': 1000})
+        self.assertEqual(len(response.data['recent_posts']), 20)
+
+    def test_recent_posts_query_count(self):
+        """Tests that embedding more posts doesn't take more
+        queries.
+        """
+        with CaptureQueriesContext(connection) as few_posts:
+            self.client.get(self.url, {'recent_posts': 2})
+
+        self.create_posts(10)
+        with CaptureQueriesContext(connection) as many_posts:
+            response = self.client.get(self.url, {'recent_posts': 12})
+
+        self.assertEqual(len(response.data['recent_posts']), 12)
+        self.assertEqual(len(many_posts), len(few_posts))
+
+
+class TopicExportTestCase(APITestCase):
+    def setUp(self):
+        self.user1 = User.objects.create(
+            username='user1',
+            password='userrules'
+        )
+        self.topic1 = Topic.objects.create(
+            title='Title 1',
+            author=self.user1,
+            description='Description',
+            url_name='title1'
+        )
+        self.topic2 = Topic.objects.create(
+            title='Title 2',
+            author=self.user1,
+            description='Description',
+            url_name='title2'
+        )
+        self.post1 = Post.objects.create(
+            author=self.user1,
+            title='Post 1',
+            content='Rich content 1',
+            topic=self.topic1
+        )
+        self.comment1 = Comment.objects.create(
+            title='Title 1',
+            author=self.user1,
+            content='A smart addendum 1',
+            post=self.post1
+        )
+        self.reply1 = Comment.objects.create(
+            title='Title 2',
+            author=self.user1,
+            content='A smart addendum 2',
+            post=self.post1,
+            parent=self.comment1
+        )
+        Post.objects.create(
+            author=self.user1,
+            title='Post 2',
+            content='Rich content 2',
+            topic=self.topic2
+        )
+        self.url = reverse('topic-export', args=[self.topic1.url_name])
+
+    def read_records(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_export(self):
+        """Tests that the whole topic, and nothing else,
+        is streamed one record per line.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+            queries_before_body = len(queries)
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        # Rows are only read while the body is being sent
+        self.assertGreater(len(queries), queries_before_body)
+
+        records = self.read_records(content)
+        self.assertEqual(
+            [(record['type'], record['id']) for record in records],
+            [
+                ('topic', self.topic1.id),
+                ('post', self.post1.id),
+                ('comment', self.comment1.id),
+                ('comment', self.reply1.id),
+            ]
+        )
+        self.assertEqual(records[3]['parent_id'], self.comment1.id)
+        self.assertEqual(records[1]['author_username'], 'user1')
+
+    def test_gzipped_export(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(self.read_records(content)), 4)
+
+    def test_export_reads_in_a_transaction(self):
+        """Tests that records are read in a transaction of their
+        own, which lets PostgreSQL cursors stream.
+        """
+        records = TopicViewSet().get_export_records(self.topic1, DEFAULT_DB_ALIAS)
+        savepoints = len(connection.savepoint_ids)
+
+        next(records)
+        self.assertEqual(len(connection.savepoint_ids), savepoints + 1)
+        records.close()
+        self.assertEqual(len(connection.savepoint_ids), savepoints)
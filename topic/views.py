@@ -4,23 +4,116 @@ Topic app's views
 ###
 # Libraries
 ###
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
-from topic.api.serializers import TopicSerializer
+from topic.api.serializers import TopicSerializer, TopicDetailSerializer
 from rest_framework.filters import OrderingFilter
+from comments.models import Comment
+from helpers.cache import CachedResponseMixin, TOPICS_SCOPE, topic_scope
+from helpers.conditional import ConditionalGetMixin
+from helpers.export import ndjson_response, read_only_snapshot
 from helpers.permissions import ObjectPermissionIsAuthenticatedOrReadOnly
+from helpers.replica import ReplicaReadMixin, get_read_database
+from posts.models import Post
 
 ###
 # Viewsets
 ###
-class TopicViewSet(ModelViewSet):
+class TopicViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                   ModelViewSet):
     """A basic viewset for the `Topic` model."""
     serializer_class = TopicSerializer
     model = TopicSerializer.Meta.model
-    queryset = model.objects.all()
+    queryset = model.objects.select_related('author')
     lookup_field = 'url_name'
     filter_backends = [OrderingFilter]
     ordering = 'id'
+    ordering_fields = ['id', 'updated_at']
     permission_classes = [ObjectPermissionIsAuthenticatedOrReadOnly]
 
+    # Columns of each record type written by `export`
+    export_fields = {
+        'topic': [
+            'id', 'title', 'description', 'url_name', 'author_id',
+            'created_at', 'updated_at',
+        ],
+        'post': [
+            'id', 'topic_id', 'title', 'content', 'author_id', 'comment_count',
+            'score', 'upvotes', 'downvotes', 'created_at', 'updated_at',
+        ],
+        'comment': [
+            'id', 'post_id', 'parent_id', 'title', 'content', 'author_id',
+            'reply_count', 'score', 'upvotes', 'downvotes', 'created_at',
+            'updated_at',
+        ],
+    }
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return [topic_scope(self.kwargs[self.lookup_field])]
+        return [TOPICS_SCOPE]
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return TopicDetailSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recent_posts_limit'] = self.get_recent_posts_limit()
+        return context
+
+    def get_recent_posts_limit(self):
+        """Reads the number of embedded posts from the
+        `recent_posts` query parameter, capped at
+        `TOPIC_RECENT_POSTS_MAX_LIMIT`.
+        """
+        try:
+            limit = int(self.request.query_params['recent_posts'])
+        except (KeyError, ValueError):
+            return settings.TOPIC_RECENT_POSTS_LIMIT
+        return max(0, min(limit, settings.TOPIC_RECENT_POSTS_MAX_LIMIT))
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """Streams the whole topic as newline delimited JSON: the
+        topic first, then its posts and then their comments, one
+        record per line, each with a `type` key.
+        """
+        topic = self.get_object()
+        # The body streams once `dispatch` has reset the read database
+        using = get_read_database() or DEFAULT_DB_ALIAS
+        return ndjson_response(
+            request,
+            self.get_export_records(topic, using),
+            '{0}.ndjson'.format(topic.url_name),
+            settings.EXPORT_CHUNK_SIZE
+        )
+
+    def get_export_records(self, topic, using):
+        """Yields the export's records, reading posts and comments
+        from `using` with server-side cursors (`iterator`),
+        `EXPORT_CHUNK_SIZE` rows at a time, in index order, all from
+        one snapshot (see `read_only_snapshot`).
+        """
+        querysets = [
+            ('topic', self.model.objects.filter(pk=topic.pk)),
+            ('post', Post.objects.filter(topic=topic).order_by('id')),
+            ('comment', Comment.objects.filter(
+                post__topic=topic
+            ).order_by('post_id', 'path')),
+        ]
+        with read_only_snapshot(using):
+            for record_type, queryset in querysets:
+                rows = queryset.using(using).values(
+                    *self.export_fields[record_type],
+                    author_username=F('author__username')
+                ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+                for row in rows:
+                    yield dict({'type': record_type}, **row)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)